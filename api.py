@@ -1,12 +1,33 @@
 import yaml
-import sqlite3
-from fastapi import FastAPI, Query
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 import uvicorn
 
+from utils.archive import ItemArchive
+from utils.batch_runs import BatchRunRecorder
+from utils.content import decode_content
+from utils.db import QueryTimeoutError, get_database
+from utils.feed_health import FeedHealthTracker
+from utils.item_stream import ItemStream
+from utils.Logger import get_logger
+from utils.migrations import migrate
+from utils.pagination import ORDER_BY, Cursor
+from utils.response_cache import ResponseCache
+from utils.search import build_keyword_condition
+from utils.serialize import (
+    EXPORT_FORMATS, ExportWriter, encode_items, encode_response, encode_rows, parse_fields, select_columns,
+    stringify_fields
+)
+
+log = get_logger(__name__)
+
 
 class FeedGrepAPI:
     def __init__(self, config_path: str, db_path: str = "feedgrep.db"):
@@ -22,6 +43,33 @@ class FeedGrepAPI:
             self.config = yaml.safe_load(f)
         
         self.db_path = db_path
+        self.db = get_database(db_path, self.config)
+        # API可能先于抓取进程启动，查询用到的表（健康状态、数据版本等）由结构迁移创建
+        migrate(self.db, self.config)
+        self.health = FeedHealthTracker(db_path, self.config)
+        self.batch_runs = BatchRunRecorder(self.db)
+        self.archive = ItemArchive(self.db, self.config)
+        
+        # 数据库查询在独立的线程池中执行，不阻塞事件循环；线程数即同时执行的查询数
+        api_config = self.config.get('api', {}) or {}
+        self.query_timeout = api_config.get('query_timeout', 10) or None
+        self.query_executor = ThreadPoolExecutor(
+            max_workers=max(1, api_config.get('max_concurrent_queries') or self.db.read_pool_size),
+            thread_name_prefix='feedgrep-api-query'
+        )
+        
+        # 响应缓存，数据版本变化（批次写入新条目）后失效
+        self.response_cache = ResponseCache(self.config)
+        self.data_version_check = (api_config.get('response_cache', {}) or {}).get('version_check_seconds', 5)
+        
+        # 流式导出每次查询一块，块之间不占用查询线程
+        export_config = api_config.get('export', {}) or {}
+        self.export_chunk_size = max(1, export_config.get('chunk_size', 1000))
+        self.export_gzip_level = export_config.get('gzip_level', 6)
+        
+        # 新条目的实时推送，批次写入后通知所有订阅者
+        self.item_stream = ItemStream(self.db, self.config, self.run_query)
+        
         self.app = FastAPI(
             title="FeedGrep API",
             description="RSS聚合器API服务",
@@ -47,18 +95,27 @@ class FeedGrepAPI:
         """设置API路由"""
         self.app.get("/api/feeds", response_model=dict)(self.get_feeds)
         self.app.get("/api/items", response_model=dict)(self.get_items)
+        self.app.get("/api/items/{item_id}", response_model=dict)(self.get_item)
         self.app.get("/api/categories", response_model=dict)(self.get_categories)
         self.app.get("/api/search", response_model=dict)(self.search_items)
+        self.app.get("/api/export")(self.export_items)
+        self.app.get("/api/stream")(self.stream_items)
         self.app.get("/api/default_keywords", response_model=dict)(self.get_default_keywords)
+        self.app.get("/api/feed_health", response_model=dict)(self.get_feed_health)
+        self.app.get("/api/rule_items", response_model=dict)(self.get_rule_items)
+        self.app.get("/api/batch_runs", response_model=dict)(self.get_batch_runs)
         self.app.get("/health", response_model=dict)(self.health_check)
     
-    async def get_feeds(self):
+    async def get_feeds(self, request: Request):
         """
         获取所有RSS源和分类信息
         
         Returns:
             JSON格式的所有RSS源和分类信息
         """
+        return await self.cached_response(request, ('feeds',), self._get_feeds)
+    
+    async def _get_feeds(self):
         try:
             categories_data = self.config.get('categories', {})
             return {
@@ -132,13 +189,50 @@ class FeedGrepAPI:
                 }
             )
 
+    async def get_feed_health(
+        self,
+        state: Optional[str] = Query(None, description="按熔断状态筛选（closed/open/half_open）"),
+        sort: str = Query('failures', description="排序方式（failures/bytes/latency）")
+    ):
+        """
+        获取RSS源健康状态
+        
+        查询参数:
+            state: 熔断状态筛选
+            sort: 排序方式，failures为熔断中的源在前，bytes为累计流量从大到小，latency为平均耗时从大到小
+            
+        Returns:
+            JSON格式的RSS源健康记录，包括连续失败次数、最近错误、最近成功时间、平均耗时和流量
+        """
+        try:
+            records = await self.run_query(self.health.get_all, sort)
+            if state:
+                records = [record for record in records if record['state'] == state]
+            
+            return {
+                'success': True,
+                'data': records,
+                'count': len(records)
+            }
+        except Exception as e:
+            return JSONResponse(
+                status_code=500,
+                content={
+                    'success': False,
+                    'error': str(e)
+                }
+            )
+
     async def get_items(
         self,
+        request: Request,
         category: Optional[str] = Query(None, description="按分类筛选"),
         source: Optional[str] = Query(None, description="按来源筛选"),
         keyword: Optional[str] = Query(None, description="关键字搜索"),
         limit: int = Query(10, ge=1, le=1000, description="返回数量限制"),
-        offset: int = Query(0, ge=0, description="偏移量")
+        offset: int = Query(0, ge=0, description="偏移量"),
+        cursor: Optional[str] = Query(None, description="分页游标（上一页返回的next_cursor），指定时忽略offset"),
+        fields: Optional[str] = Query(None, description="返回的字段，逗号分隔，默认除item_hash外的全部字段")
     ):
         """
         从数据库获取RSS条目，支持查询参数
@@ -149,13 +243,33 @@ class FeedGrepAPI:
             keyword: 关键字搜索
             limit: 返回数量限制，默认50，最大1000
             offset: 偏移量，默认0
+            cursor: 分页游标，翻页越深越应使用游标，查询代价不随页数增加
+            fields: 返回的字段（如id,title,link），只查询和序列化需要的列
             
         Returns:
-            JSON格式的RSS条目数据
+            JSON格式的RSS条目数据，next_cursor为下一页的游标（没有更多条目时为null）
         """
         try:
-            # 构建查询语句
-            query = "SELECT * FROM feedgrep_items WHERE 1=1"
+            selected = parse_fields(fields)
+        except ValueError as e:
+            return self._bad_request(str(e))
+        
+        key = ('items', category, source, _normalize_keyword(keyword), limit, offset, cursor, tuple(selected))
+        return await self.cached_response(
+            request, key, self._get_items, category, source, keyword, limit, offset, cursor, selected
+        )
+    
+    async def _get_items(self, category: Optional[str], source: Optional[str], keyword: Optional[str],
+                         limit: int, offset: int, cursor: Optional[str], fields: List[str]):
+        try:
+            position = Cursor.decode(cursor) if cursor else None
+        except ValueError as e:
+            return self._bad_request(str(e))
+        
+        try:
+            # 构建查询语句，只查询需要返回的列（以及游标需要的列）
+            columns = select_columns(fields)
+            query = f"SELECT {', '.join(columns)} FROM feedgrep_items WHERE 1=1"
             params = []
             
             if category:
@@ -167,63 +281,60 @@ class FeedGrepAPI:
                 params.append(source)
                 
             if keyword:
-                # 解析关键词语法
-                # 普通词：包含其中任意一个词就会被捕获，多个关键词使用空格分隔
-                # 必须词：必须同时包含普通词和必须词才会被捕获，使用+分隔  
-                # 排除词：包含过滤词的新闻会被直接排除，即使包含关键词，使用-分隔
-                
-                required_keywords = []  # 必须包含的关键词 (+)
-                excluded_keywords = []  # 必须排除的关键词 (-)
-                normal_keywords = []    # 普通关键词 (空格分隔)
-                
-                # 解析关键词
-                parts = keyword.split()
-                for part in parts:
-                    if part.startswith('+'):
-                        required_keywords.append(part[1:])  # 去掉+号
-                    elif part.startswith('-'):
-                        excluded_keywords.append(part[1:])  # 去掉-号
-                    else:
-                        normal_keywords.append(part)
-                
-                # 处理普通关键词 (OR关系)
-                if normal_keywords:
-                    or_conditions = []
-                    for kw in normal_keywords:
-                        or_conditions.append("(title LIKE ? OR description LIKE ?)")
-                        params.extend([f"%{kw}%", f"%{kw}%"])
-                    query += " AND (" + " OR ".join(or_conditions) + ")"
-                
-                # 处理必须关键词 (AND关系)
-                for kw in required_keywords:
-                    query += " AND (title LIKE ? OR description LIKE ?)"
-                    params.extend([f"%{kw}%", f"%{kw}%"])
-                
-                # 处理排除关键词
-                for kw in excluded_keywords:
-                    query += " AND (title NOT LIKE ? AND description NOT LIKE ?)"
-                    params.extend([f"%{kw}%", f"%{kw}%"])
-            
-            query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
+                # 关键词语法见utils.search.parse_keywords，编译为全文索引查询
+                keyword_condition, keyword_params = build_keyword_condition(keyword)
+                if keyword_condition:
+                    query += " AND " + keyword_condition
+                    params.extend(keyword_params)
             
             # 执行查询
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # 使结果可以通过列名访问
-            cursor = conn.cursor()
-            cursor.execute(query, params)
+            data, next_position = await self.run_query(
+                self._query_page, query, params, columns, fields, category, source, keyword, limit, offset, position
+            )
             
-            # 获取结果
-            rows = cursor.fetchall()
-            items = [dict(row) for row in rows]
+            return encode_response(
+                data,
+                count=len(data),
+                next_cursor=next_position.encode() if next_position else None
+            )
+        except QueryTimeoutError as e:
+            return self._timeout_response(str(e))
+        except Exception as e:
+            return JSONResponse(
+                status_code=500,
+                content={
+                    'success': False,
+                    'error': str(e)
+                }
+            )
+    
+    async def get_item(self, item_id: int):
+        """
+        获取单个RSS条目的详情，包含完整内容（列表接口中的description只是纯文本摘要）
+        
+        Args:
+            item_id: 条目ID
             
-            conn.close()
+        Returns:
+            JSON格式的条目数据，content字段为完整的HTML内容
+        """
+        try:
+            item = await self.run_query(self._load_item, item_id)
+            if item is None:
+                return JSONResponse(
+                    status_code=404,
+                    content={
+                        'success': False,
+                        'error': f'Item {item_id} not found'
+                    }
+                )
             
             return {
                 'success': True,
-                'data': items,
-                'count': len(items)
+                'data': item
             }
+        except QueryTimeoutError as e:
+            return self._timeout_response(str(e))
         except Exception as e:
             return JSONResponse(
                 status_code=500,
@@ -233,13 +344,189 @@ class FeedGrepAPI:
                 }
             )
     
+    def _load_item(self, item_id: int) -> Optional[Dict]:
+        """读取单个条目及其完整内容，已归档的条目从归档段文件中读取"""
+        with self.db.reader(self.query_timeout) as conn:
+            row = conn.execute('''
+                SELECT i.*, c.encoding AS content_encoding, c.content AS content_data
+                FROM feedgrep_items i LEFT JOIN feedgrep_item_content c ON c.item_id = i.id
+                WHERE i.id = ?
+            ''', (item_id,)).fetchone()
+        
+        if row is None:
+            item = self.archive.get_item(item_id)
+            return stringify_fields(item) if item else None
+        
+        item = dict(row)
+        encoding = item.pop('content_encoding')
+        data = item.pop('content_data')
+        item['content'] = decode_content(encoding, data) if data is not None else item['description']
+        return stringify_fields(item)
+    
+    def _query_page(self, query: str, params: List, columns: List[str], fields: List[str],
+                    category: Optional[str], source: Optional[str], keyword: Optional[str],
+                    limit: int, offset: int, position: Optional[Cursor]) -> Tuple[List[str], Optional[Cursor]]:
+        """
+        查询一页条目并编码为JSON（见_query_rows），查询结果按行元组直接编码，不构建中间的字典
+        
+        Returns:
+            (编码后的条目列表, 下一页的游标)
+        """
+        rows, archived, next_position = self._query_rows(
+            query, params, columns, category, source, keyword, limit, offset, position
+        )
+        return encode_rows(fields, rows) + encode_items(fields, archived), next_position
+    
+    def _query_rows(self, query: str, params: List, columns: List[str], category: Optional[str],
+                    source: Optional[str], keyword: Optional[str], limit: int, offset: int,
+                    position: Optional[Cursor], since: Optional[str] = None,
+                    until: Optional[str] = None) -> Tuple[List[tuple], List[Dict], Optional[Cursor]]:
+        """
+        按(created_at, id)倒序查询一页条目，在线条目不足一页时（请求超出了在线数据的范围）用归档条目补齐
+        
+        指定游标时从游标位置之后继续读取（使用组合索引定位，忽略offset），否则按offset跳过。
+        归档条目是只读的，排在所有在线条目之后。
+        
+        Args:
+            query: 在线查询的SQL（不含排序和分页）
+            params: 在线查询的参数
+            columns: 在线查询的列（需包含created_at和id）
+            category: 分类筛选
+            source: 来源筛选
+            keyword: 关键词表达式
+            limit: 返回数量限制
+            offset: 偏移量
+            position: 分页游标
+            since: 入库时间下限（在线查询的条件已包含在query中，用于筛选归档条目）
+            until: 入库时间上限（同上）
+            
+        Returns:
+            (在线条目的行元组列表, 归档条目列表, 下一页的游标)，本页不足limit条时说明已经没有更多条目，游标为None
+        """
+        rows = []
+        if position is None or not position.archived:
+            page_query = query
+            page_params = list(params)
+            if position is not None:
+                condition, condition_params = position.condition()
+                page_query += " AND " + condition
+                page_params.extend(condition_params)
+            page_query += f" ORDER BY {ORDER_BY} LIMIT ?"
+            page_params.append(limit)
+            if position is None:
+                page_query += " OFFSET ?"
+                page_params.append(offset)
+            
+            with self.db.reader(self.query_timeout) as conn:
+                db_cursor = conn.cursor()
+                db_cursor.row_factory = None
+                rows = db_cursor.execute(page_query, page_params).fetchall()
+        
+        if len(rows) >= limit or not self.archive.has_blocks():
+            if len(rows) < limit:
+                return rows, [], None
+            last = rows[-1]
+            return rows, [], Cursor(last[columns.index('created_at')], last[columns.index('id')])
+        
+        archive_offset = 0
+        before_id = None
+        if position is not None:
+            before_id = position.item_id if position.archived else None
+        elif offset and not rows:
+            # 按偏移量翻页时先算出在线条目的总数，归档条目的偏移量从在线条目之后算起
+            with self.db.reader(self.query_timeout) as conn:
+                live_total = conn.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+            archive_offset = max(0, offset - live_total)
+        
+        archived = self.archive.get_items(
+            category, source, keyword, archive_offset, limit - len(rows), before_id, since, until
+        )
+        if len(rows) + len(archived) < limit:
+            return rows, archived, None
+        return rows, archived, Cursor.after(archived[-1])
+    
+    async def cached_response(self, request: Request, key: tuple, build: Callable, *args) -> Response:
+        """
+        返回带ETag的响应，数据版本未变化时直接使用缓存
+        
+        客户端的If-None-Match与当前ETag相同时返回304，既不读取缓存也不查询数据库；
+        否则使用缓存的响应内容，没有缓存时调用build生成并缓存（出错的响应不缓存）。
+        
+        Args:
+            request: 当前请求
+            key: 规范化后的查询参数
+            build: 生成响应数据的协程函数，返回响应字典、已编码的响应内容或出错时的JSONResponse
+            *args: 传给build的参数
+            
+        Returns:
+            响应
+        """
+        # 先读取版本再生成响应：生成期间数据有变化时缓存的是旧版本，下次请求即失效。
+        # 进程内的值过期时才查询数据库，查询在线程池中执行，不阻塞事件循环
+        version = self.db.cached_data_version(self.data_version_check)
+        if version is None:
+            version = await self.run_query(self.db.get_data_version, self.data_version_check)
+        etag = self.response_cache.etag(key, version)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match and (if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]):
+            return Response(status_code=304, headers=headers)
+        
+        body = self.response_cache.get(key, version)
+        if body is None:
+            result = await build(*args)
+            if isinstance(result, Response):
+                return result
+            body = result if isinstance(result, bytes) else JSONResponse(result).body
+            self.response_cache.put(key, version, body)
+        
+        return Response(content=body, media_type='application/json', headers=headers)
+    
+    async def run_query(self, func: Callable, *args):
+        """
+        在查询线程池中执行同步的数据库访问，事件循环在等待期间可以继续处理其他请求
+        
+        线程池满时新的查询排队等待，同时执行的查询数不超过max_concurrent_queries。
+        
+        Args:
+            func: 执行查询的函数
+            *args: 传给func的参数
+            
+        Returns:
+            func的返回值
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.query_executor, functools.partial(func, *args))
+    
+    def _bad_request(self, error: str) -> JSONResponse:
+        return JSONResponse(
+            status_code=400,
+            content={
+                'success': False,
+                'error': error
+            }
+        )
+    
+    def _timeout_response(self, error: str) -> JSONResponse:
+        return JSONResponse(
+            status_code=504,
+            content={
+                'success': False,
+                'error': error
+            }
+        )
+    
     async def search_items(
         self,
+        request: Request,
         keyword: str = Query(..., description="搜索关键字"),
         category: Optional[str] = Query(None, description="按分类筛选"),
         source: Optional[str] = Query(None, description="按来源筛选"),
         limit: int = Query(50, ge=1, le=1000, description="返回数量限制"),
-        offset: int = Query(0, ge=0, description="偏移量")
+        offset: int = Query(0, ge=0, description="偏移量"),
+        cursor: Optional[str] = Query(None, description="分页游标（上一页返回的next_cursor），指定时忽略offset"),
+        fields: Optional[str] = Query(None, description="返回的字段，逗号分隔，默认除item_hash外的全部字段")
     ):
         """
         搜索RSS条目
@@ -250,56 +537,38 @@ class FeedGrepAPI:
             source: 来源筛选
             limit: 返回数量限制，默认50，最大1000
             offset: 偏移量，默认0
+            cursor: 分页游标，翻页越深越应使用游标，查询代价不随页数增加
+            fields: 返回的字段（如id,title,link），只查询和序列化需要的列
             
         Returns:
-            JSON格式的RSS条目数据
+            JSON格式的RSS条目数据，next_cursor为下一页的游标（没有更多条目时为null）
         """
         try:
-            # 解析关键词语法
-            # 普通词：包含其中任意一个词就会被捕获，多个关键词使用空格分隔
-            # 必须词：必须同时包含普通词和必须词才会被捕获，使用+分隔  
-            # 排除词：包含过滤词的新闻会被直接排除，即使包含关键词，使用-分隔
-            
-            required_keywords = []  # 必须包含的关键词 (+)
-            excluded_keywords = []  # 必须排除的关键词 (-)
-            normal_keywords = []    # 普通关键词 (空格分隔)
-            
-            # 解析关键词
-            parts = keyword.split()
-            for part in parts:
-                if part.startswith('+'):
-                    required_keywords.append(part[1:])  # 去掉+号
-                elif part.startswith('-'):
-                    excluded_keywords.append(part[1:])  # 去掉-号
-                else:
-                    normal_keywords.append(part)
-            
-            # 构建查询语句
-            query_conditions = []
-            params = []
-            
-            # 处理普通关键词 (OR关系)
-            if normal_keywords:
-                or_conditions = []
-                for kw in normal_keywords:
-                    or_conditions.append("(title LIKE ? OR description LIKE ?)")
-                    params.extend([f"%{kw}%", f"%{kw}%"])
-                query_conditions.append("(" + " OR ".join(or_conditions) + ")")
-            
-            # 处理必须关键词 (AND关系)
-            for kw in required_keywords:
-                query_conditions.append("(title LIKE ? OR description LIKE ?)")
-                params.extend([f"%{kw}%", f"%{kw}%"])
-            
-            # 处理排除关键词
-            for kw in excluded_keywords:
-                query_conditions.append("(title NOT LIKE ? AND description NOT LIKE ?)")
-                params.extend([f"%{kw}%", f"%{kw}%"])
+            selected = parse_fields(fields)
+        except ValueError as e:
+            return self._bad_request(str(e))
+        
+        key = ('search', _normalize_keyword(keyword), category, source, limit, offset, cursor, tuple(selected))
+        return await self.cached_response(
+            request, key, self._search_items, keyword, category, source, limit, offset, cursor, selected
+        )
+    
+    async def _search_items(self, keyword: str, category: Optional[str], source: Optional[str],
+                            limit: int, offset: int, cursor: Optional[str], fields: List[str]):
+        try:
+            position = Cursor.decode(cursor) if cursor else None
+        except ValueError as e:
+            return self._bad_request(str(e))
+        
+        try:
+            # 关键词语法见utils.search.parse_keywords，编译为全文索引查询
+            keyword_condition, params = build_keyword_condition(keyword)
             
-            # 基础查询
-            query = "SELECT * FROM feedgrep_items WHERE "
-            if query_conditions:
-                query += " AND ".join(query_conditions)
+            # 基础查询，只查询需要返回的列（以及游标需要的列）
+            columns = select_columns(fields)
+            query = f"SELECT {', '.join(columns)} FROM feedgrep_items WHERE "
+            if keyword_condition:
+                query += keyword_condition
             else:
                 query += "1=1"  # 没有条件时的占位符
             
@@ -312,26 +581,285 @@ class FeedGrepAPI:
                 query += " AND source_name = ?"
                 params.append(source)
             
-            query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
-            
             # 执行查询
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # 使结果可以通过列名访问
-            cursor = conn.cursor()
-            cursor.execute(query, params)
+            data, next_position = await self.run_query(
+                self._query_page, query, params, columns, fields, category, source, keyword, limit, offset, position
+            )
+            
+            return encode_response(
+                data,
+                count=len(data),
+                keyword=keyword,
+                next_cursor=next_position.encode() if next_position else None
+            )
+        except QueryTimeoutError as e:
+            return self._timeout_response(str(e))
+        except Exception as e:
+            return JSONResponse(
+                status_code=500,
+                content={
+                    'success': False,
+                    'error': str(e)
+                }
+            )
+    
+    async def export_items(
+        self,
+        request: Request,
+        format: str = Query('ndjson', description="导出格式（ndjson/csv）"),
+        category: Optional[str] = Query(None, description="按分类筛选"),
+        source: Optional[str] = Query(None, description="按来源筛选"),
+        keyword: Optional[str] = Query(None, description="关键字搜索"),
+        since: Optional[str] = Query(None, description="入库时间下限（UTC，包含），如2024-01-01或2024-01-01T08:00:00"),
+        until: Optional[str] = Query(None, description="入库时间上限（UTC，不包含）"),
+        fields: Optional[str] = Query(None, description="导出的字段，逗号分隔，默认除item_hash外的全部字段"),
+        cursor: Optional[str] = Query(None, description="从该游标之后继续导出（中断后续传）")
+    ):
+        """
+        流式导出RSS条目，用于批量拉取全部历史
+        
+        按(created_at, id)倒序逐块查询并输出（分块传输），每块使用游标定位，导出的总代价与条目数成正比，
+        占用的内存与导出的总条目数无关。客户端的Accept-Encoding包含gzip时压缩输出。
+        
+        查询参数:
+            format: 导出格式，ndjson为每行一个JSON对象，csv第一行为表头
+            category: 分类筛选
+            source: 来源筛选
+            keyword: 关键字搜索
+            since: 入库时间下限
+            until: 入库时间上限
+            fields: 导出的字段
+            cursor: 续传游标，取已收到的最后一条的cursor字段（也可以使用/api/items返回的next_cursor）
+            
+        Returns:
+            流式响应，每条记录的最后一列cursor为该条之后的续传游标
+        """
+        if format not in EXPORT_FORMATS:
+            return self._bad_request(f"Unknown format: {format} (available: {', '.join(EXPORT_FORMATS)})")
+        try:
+            selected = parse_fields(fields)
+            position = Cursor.decode(cursor) if cursor else None
+            since = _parse_time(since)
+            until = _parse_time(until)
+        except ValueError as e:
+            return self._bad_request(str(e))
+        
+        # 构建查询语句，筛选条件与/api/items一致
+        columns = select_columns(selected)
+        query = f"SELECT {', '.join(columns)} FROM feedgrep_items WHERE 1=1"
+        params = []
+        
+        if category:
+            query += " AND category = ?"
+            params.append(category)
+        
+        if source:
+            query += " AND source_name = ?"
+            params.append(source)
+        
+        if keyword:
+            keyword_condition, keyword_params = build_keyword_condition(keyword)
+            if keyword_condition:
+                query += " AND " + keyword_condition
+                params.extend(keyword_params)
+        
+        if since:
+            query += " AND created_at >= ?"
+            params.append(since)
+        
+        if until:
+            query += " AND created_at < ?"
+            params.append(until)
+        
+        writer = ExportWriter(format, selected + ['cursor'], _accepts_gzip(request), self.export_gzip_level)
+        args = (writer, query, params, columns, category, source, keyword, since, until)
+        
+        # 先查询第一块再开始响应，查询出错时还能返回错误状态码
+        try:
+            first_chunk, next_position = await self.run_query(self._export_chunk, *args, position)
+        except QueryTimeoutError as e:
+            return self._timeout_response(str(e))
+        except Exception as e:
+            return JSONResponse(
+                status_code=500,
+                content={
+                    'success': False,
+                    'error': str(e)
+                }
+            )
+        
+        headers = {
+            'Content-Disposition': f'attachment; filename="feedgrep-export.{format}"',
+            'Vary': 'Accept-Encoding'
+        }
+        if writer.compressor is not None:
+            headers['Content-Encoding'] = 'gzip'
+        return StreamingResponse(
+            self._export_stream(args, first_chunk, next_position),
+            media_type=writer.media_type,
+            headers=headers
+        )
+    
+    async def _export_stream(self, args: tuple, first_chunk: bytes,
+                             next_position: Optional[Cursor]) -> AsyncIterator[bytes]:
+        """逐块查询并输出导出内容，每块单独提交到查询线程池"""
+        writer = args[0]
+        try:
+            yield first_chunk
+            while next_position is not None:
+                chunk, next_position = await self.run_query(self._export_chunk, *args, next_position)
+                yield chunk
+            yield writer.close()
+        except Exception as e:
+            # 响应头已经发出，只能中断连接，客户端按最后收到的cursor续传
+            log.error(f"Export aborted: {e}")
+            raise
+    
+    def _export_chunk(self, writer: ExportWriter, query: str, params: List, columns: List[str],
+                      category: Optional[str], source: Optional[str], keyword: Optional[str],
+                      since: Optional[str], until: Optional[str],
+                      position: Optional[Cursor]) -> Tuple[bytes, Optional[Cursor]]:
+        """
+        查询并编码一块导出的条目
+        
+        Returns:
+            (编码后的内容, 下一块的游标)，没有更多条目时游标为None
+        """
+        rows, archived, next_position = self._query_rows(
+            query, params, columns, category, source, keyword, self.export_chunk_size, 0, position, since, until
+        )
+        
+        fields = writer.fields[:-1]
+        count = len(fields)
+        created_at_index = columns.index('created_at')
+        id_index = columns.index('id')
+        records = [row[:count] + (Cursor(row[created_at_index], row[id_index]).encode(),) for row in rows]
+        records.extend(
+            tuple(item.get(field) for field in fields) + (Cursor.after(item).encode(),) for item in archived
+        )
+        return writer.write(records), next_position
+    
+    async def stream_items(
+        self,
+        request: Request,
+        category: Optional[str] = Query(None, description="只推送该分类的条目"),
+        source: Optional[str] = Query(None, description="只推送该来源的条目"),
+        rule: Optional[str] = Query(None, description="只推送匹配该关键词规则的条目（规则ID，同/api/rule_items）")
+    ):
+        """
+        通过Server-Sent Events实时推送新条目
+        
+        批次写入新条目后推送item事件（data为条目摘要的JSON，id为条目ID）。客户端重连时浏览器自动带上
+        Last-Event-ID，断开期间的条目从缓冲区补发；缺失的条目超出缓冲区范围时推送reset事件，客户端应重新加载列表。
+        客户端读取太慢、待发送的条目超过队列上限时推送evicted事件并断开连接。
+        
+        查询参数:
+            category: 分类筛选
+            source: 来源筛选
+            rule: 关键词规则筛选
             
-            # 获取结果
-            rows = cursor.fetchall()
-            items = [dict(row) for row in rows]
+        Returns:
+            text/event-stream流式响应
+        """
+        last_event_id = request.headers.get('last-event-id')
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_event_id = None
+        
+        try:
+            rule_id = ' '.join(rule.split()) if rule else None
+            subscriber = await self.item_stream.subscribe(category, source, rule_id, last_event_id)
+        except Exception as e:
+            return JSONResponse(
+                status_code=500,
+                content={
+                    'success': False,
+                    'error': str(e)
+                }
+            )
+        
+        return StreamingResponse(
+            self.item_stream.events(subscriber),
+            media_type='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
+    async def get_rule_items(
+        self,
+        rule: str = Query(..., description="关键词规则ID（未配置id时为关键词表达式）"),
+        limit: int = Query(50, ge=1, le=1000, description="返回数量限制"),
+        offset: int = Query(0, ge=0, description="偏移量"),
+        fields: Optional[str] = Query(None, description="返回的字段，逗号分隔，默认除item_hash外的全部字段")
+    ):
+        """
+        获取匹配某条关键词规则的RSS条目（条目写入时记录的匹配结果）
+        
+        查询参数:
+            rule: 关键词规则ID（必填）
+            limit: 返回数量限制，默认50，最大1000
+            offset: 偏移量，默认0
+            fields: 返回的字段（如id,title,link），只查询和序列化需要的列
             
-            conn.close()
+        Returns:
+            JSON格式的RSS条目数据
+        """
+        try:
+            selected = parse_fields(fields)
+        except ValueError as e:
+            return self._bad_request(str(e))
+        
+        try:
+            rule_id = ' '.join(rule.split())
+            data = await self.run_query(self._load_rule_items, rule_id, limit, offset, selected)
             
+            return Response(
+                content=encode_response(data, count=len(data), rule=rule_id),
+                media_type='application/json'
+            )
+        except QueryTimeoutError as e:
+            return self._timeout_response(str(e))
+        except Exception as e:
+            return JSONResponse(
+                status_code=500,
+                content={
+                    'success': False,
+                    'error': str(e)
+                }
+            )
+    
+    def _load_rule_items(self, rule_id: str, limit: int, offset: int, fields: List[str]) -> List[str]:
+        columns = ', '.join(f'i.{field}' for field in fields)
+        with self.db.reader(self.query_timeout) as conn:
+            db_cursor = conn.cursor()
+            db_cursor.row_factory = None
+            rows = db_cursor.execute(f'''
+                SELECT {columns} FROM keyword_matches m
+                JOIN feedgrep_items i ON i.id = m.item_id
+                WHERE m.rule_id = ?
+                ORDER BY m.item_id DESC LIMIT ? OFFSET ?
+            ''', (rule_id, limit, offset)).fetchall()
+        return encode_rows(fields, rows)
+    
+    async def get_batch_runs(
+        self,
+        limit: int = Query(50, ge=1, le=1000, description="返回数量限制")
+    ):
+        """
+        获取最近的抓取批次记录，包含计数和分阶段耗时
+        
+        查询参数:
+            limit: 返回数量限制，默认50，最大1000
+            
+        Returns:
+            JSON格式的批次记录，最新的在前
+        """
+        try:
+            runs = await self.run_query(self.batch_runs.get_recent, limit)
             return {
                 'success': True,
-                'data': items,
-                'count': len(items),
-                'keyword': keyword
+                'data': runs,
+                'count': len(runs)
             }
         except Exception as e:
             return JSONResponse(
@@ -363,4 +891,36 @@ class FeedGrepAPI:
             port: 监听端口
             **kwargs: 传递给uvicorn的其他参数
         """
-        uvicorn.run(self.app, host=host, port=port, **kwargs)
\ No newline at end of file
+        uvicorn.run(self.app, host=host, port=port, **kwargs)
+
+
+def _normalize_keyword(keyword: Optional[str]) -> Optional[str]:
+    """规范化关键词表达式中的空白，作为缓存键的一部分"""
+    return ' '.join(keyword.split()) if keyword else None
+
+
+def _parse_time(value: Optional[str]) -> Optional[str]:
+    """
+    把时间参数转换为created_at的格式（UTC的YYYY-MM-DD HH:MM:SS），带时区的时间先转换为UTC
+
+    Raises:
+        ValueError: 时间格式不正确
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"Invalid time: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _accepts_gzip(request: Request) -> bool:
+    """客户端的Accept-Encoding是否接受gzip"""
+    for encoding in request.headers.get('accept-encoding', '').split(','):
+        name, _, params = encoding.partition(';')
+        if name.strip().lower() == 'gzip':
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+条目列表接口序列化性能对比
+对比原来的查询路径（SELECT * → 字典 → JSONResponse）与按字段投影、按行直接编码的路径，
+在临时生成的数据库上测量查询加序列化一页条目的耗时和响应大小，并校验两者结果一致
+
+用法:
+    python benchmarks/bench_api_items.py
+    python benchmarks/bench_api_items.py --items 100000 --limit 1000 --repeat 50
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+from typing import Callable, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+
+from utils.pagination import ORDER_BY
+from utils.serialize import encode_response, encode_rows, parse_fields, select_columns, stringify_fields
+
+WORDS = ['AI', '人工智能', '模型', 'Python', 'SQLite', '数据库', '安全', '漏洞', 'release', 'update', '开源', '发布']
+
+
+def create_database(path: str, count: int):
+    """生成测试数据库，条目的字段长度接近真实RSS条目（摘要约300字）"""
+    rng = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE feedgrep_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            link TEXT NOT NULL,
+            description TEXT,
+            pub_date TEXT,
+            guid TEXT,
+            category TEXT,
+            source_name TEXT,
+            batch_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            item_hash INTEGER
+        )
+    ''')
+    conn.execute('CREATE INDEX idx_created_at_id ON feedgrep_items(created_at, id)')
+
+    rows = []
+    for i in range(count):
+        title = ' '.join(rng.choice(WORDS) for _ in range(8))
+        rows.append((
+            f'{title} #{i}',
+            f'https://example.com/posts/{i}',
+            ' '.join(rng.choice(WORDS) for _ in range(60)),
+            'Mon, 01 Jan 2024 00:00:00 GMT',
+            f'guid-{i}',
+            rng.choice(['tech', 'news', 'security']),
+            f'Source {i % 50}',
+            f'batch-{i // 500}',
+            f'2024-01-{1 + i * 28 // count:02d} 00:00:00',
+            rng.getrandbits(63)
+        ))
+    conn.executemany('''
+        INSERT INTO feedgrep_items
+        (title, link, description, pub_date, guid, category, source_name, batch_id, created_at, item_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+
+
+def render_dicts(conn: sqlite3.Connection, limit: int, offset: int, fields: Optional[str]) -> bytes:
+    """原来的路径：查询所有列，每行转为字典，由JSONResponse序列化"""
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(
+        f'SELECT * FROM feedgrep_items ORDER BY {ORDER_BY} LIMIT ? OFFSET ?', (limit, offset)
+    ).fetchall()
+    items = [dict(row) for row in rows]
+    # 原来的接口没有fields参数，这里在字典上投影（item_hash按新接口编码为字符串），作为同样输出的对照
+    items = [stringify_fields({field: item[field] for field in parse_fields(fields)}) for item in items]
+    return JSONResponse({'success': True, 'data': items, 'count': len(items), 'next_cursor': None}).body
+
+
+def render_rows(conn: sqlite3.Connection, limit: int, offset: int, fields: Optional[str]) -> bytes:
+    """新的路径：只查询需要的列，按行元组直接编码"""
+    selected = parse_fields(fields)
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    rows = cursor.execute(
+        f"SELECT {', '.join(select_columns(selected))} FROM feedgrep_items ORDER BY {ORDER_BY} LIMIT ? OFFSET ?",
+        (limit, offset)
+    ).fetchall()
+    data = encode_rows(selected, rows)
+    return encode_response(data, count=len(data), next_cursor=None)
+
+
+def time_render(render: Callable, conn: sqlite3.Connection, limit: int, fields: Optional[str],
+                repeat: int, pages: int) -> float:
+    """返回单页的平均耗时（毫秒），依次读取前pages页"""
+    start = time.perf_counter()
+    for i in range(repeat):
+        render(conn, limit, (i % pages) * limit, fields)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def run_benchmark(db_path: str, limit: int, repeat: int, field_sets: List[Optional[str]]):
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    total = conn.execute('SELECT COUNT(*) FROM feedgrep_items').fetchone()[0]
+    pages = max(1, min(10, total // limit))
+
+    print(f"{'字段':<28} {'大小KB':>8} {'原路径 ms':>10} {'新路径 ms':>10} {'加速':>6}  一致")
+    for fields in field_sets:
+        old_body = render_dicts(conn, limit, 0, fields)
+        new_body = render_rows(conn, limit, 0, fields)
+        same = json.loads(old_body) == json.loads(new_body)
+
+        old = time_render(render_dicts, conn, limit, fields, repeat, pages)
+        new = time_render(render_rows, conn, limit, fields, repeat, pages)
+
+        print(f"{(fields or '(默认)')[:28]:<28} {len(new_body) / 1024:>8.1f} {old:>10.2f} {new:>10.2f} "
+              f"{old / new if new else 0:>5.1f}x  {'✅' if same else '⚠️'}")
+
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='条目列表接口序列化性能对比')
+    parser.add_argument('--items', type=int, default=50000, help='测试数据库的条目数')
+    parser.add_argument('--limit', type=int, default=1000, help='每页条目数')
+    parser.add_argument('--repeat', type=int, default=30, help='每种字段组合的测量次数')
+    parser.add_argument('--fields', action='append',
+                        help='要对比的字段组合（逗号分隔，可多次指定），默认为默认字段和id,title,link')
+
+    args = parser.parse_args()
+    field_sets = args.fields or [None, 'id,title,link']
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bench.db')
+        create_database(db_path, args.items)
+        run_benchmark(db_path, args.limit, args.repeat, field_sets)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+RSS解析引擎性能对比
+对比feedparser与fast两种解析引擎在真实RSS源语料上的耗时和结果一致性
+
+用法:
+    # 按feedgrep.yaml抓取所有RSS源，保存为语料
+    python benchmarks/bench_parsers.py --save
+    # 在已保存的语料上运行对比
+    python benchmarks/bench_parsers.py --repeat 20
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yaml
+
+from utils.feed_parser import ENGINE_FAST, ENGINE_FEEDPARSER, parse_feed
+from utils.http_client import get_http_client
+
+
+def save_corpus(config_path: str, corpus_dir: str):
+    """按配置文件抓取所有RSS源，原样保存响应内容"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    client = get_http_client(config)
+
+    for category, feeds in (config.get('categories') or {}).items():
+        for feed in feeds or []:
+            name = feed.get('name', 'Unknown')
+            url = feed.get('url', '')
+            if not url:
+                continue
+            try:
+                response = client.get(url, timeout=30)
+                response.raise_for_status()
+            except Exception as e:
+                print(f"❌ {name}: {e}")
+                continue
+
+            filename = f"{category}-{name}".replace('/', '_').replace(' ', '_') + '.xml'
+            with open(os.path.join(corpus_dir, filename), 'wb') as f:
+                f.write(response.content)
+            print(f"✅ {name}: {len(response.content) / 1024:.1f} KB")
+
+
+def load_corpus(corpus_dir: str) -> List[Tuple[str, bytes]]:
+    """读取语料目录下的所有文件"""
+    corpus = []
+    for filename in sorted(os.listdir(corpus_dir)):
+        path = os.path.join(corpus_dir, filename)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                corpus.append((filename, f.read()))
+    return corpus
+
+
+def time_engine(content: bytes, engine: str, repeat: int) -> float:
+    """返回单次解析的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse_feed(content, engine)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def run_benchmark(corpus: List[Tuple[str, bytes]], repeat: int):
+    print(f"{'文件':<40} {'大小KB':>8} {'条目':>5} {'feedparser ms':>14} {'fast ms':>9} {'加速':>6}  一致")
+    total_slow = total_fast = 0.0
+
+    for filename, content in corpus:
+        slow_rows = parse_feed(content, ENGINE_FEEDPARSER)
+        fast_rows = parse_feed(content, ENGINE_FAST)
+
+        # 两种引擎的所有字段（包括解析后的链接和清理后的摘要）都应一致
+        same = slow_rows == fast_rows
+
+        slow = time_engine(content, ENGINE_FEEDPARSER, repeat)
+        fast = time_engine(content, ENGINE_FAST, repeat)
+        total_slow += slow
+        total_fast += fast
+
+        print(f"{filename[:40]:<40} {len(content) / 1024:>8.1f} {len(slow_rows):>5} "
+              f"{slow:>14.2f} {fast:>9.2f} {slow / fast if fast else 0:>5.1f}x  {'✅' if same else '⚠️'}")
+
+    if corpus:
+        print(f"{'合计':<40} {'':>8} {'':>5} {total_slow:>14.2f} {total_fast:>9.2f} "
+              f"{total_slow / total_fast if total_fast else 0:>5.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RSS解析引擎性能对比')
+    parser.add_argument('--config', default='feedgrep.yaml', help='配置文件路径（--save时使用）')
+    parser.add_argument('--corpus', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus'),
+                        help='语料目录')
+    parser.add_argument('--save', action='store_true', help='抓取配置中的RSS源保存为语料')
+    parser.add_argument('--repeat', type=int, default=10, help='每个文件的解析次数')
+
+    args = parser.parse_args()
+
+    if args.save:
+        save_corpus(args.config, args.corpus)
+        return
+
+    if not os.path.isdir(args.corpus):
+        print(f"❌ 语料目录不存在: {args.corpus}，请先运行 --save")
+        sys.exit(1)
+
+    run_benchmark(load_corpus(args.corpus), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,13 +7,14 @@ FeedGrep GitHub Actions - 静态页面生成脚本
 import os
 import sys
 import json
-import requests
 import argparse
 from datetime import datetime
 from typing import List, Dict
 from collections import defaultdict
 from urllib.parse import quote
 
+from utils.http_client import get_http_client
+
 
 class GitHubIssuesReader:
     """从GitHub Issues读取数据"""
@@ -23,6 +24,7 @@ class GitHubIssuesReader:
         self.owner = owner
         self.repo = repo
         self.base_url = f"https://api.github.com/repos/{owner}/{repo}"
+        self.http_client = get_http_client()
         self.headers = {
             "Accept": "application/vnd.github.v3+json",
             "Authorization": f"token {token}",
@@ -37,7 +39,7 @@ class GitHubIssuesReader:
         while True:
             try:
                 url = f"{self.base_url}/issues?state={state}&per_page=100&page={page}"
-                response = requests.get(url, headers=self.headers, timeout=10)
+                response = self.http_client.get(url, headers=self.headers, timeout=10)
                 
                 if response.status_code != 200:
                     break
@@ -7,9 +7,10 @@
 import os
 import sys
 import argparse
-import requests
 from typing import List, Dict
 
+from utils.http_client import get_http_client
+
 
 class IssuesCleaner:
     """清理GitHub Issues的工具类"""
@@ -19,6 +20,7 @@ class IssuesCleaner:
         self.owner = owner
         self.repo = repo
         self.base_url = f"https://api.github.com/repos/{owner}/{repo}"
+        self.http_client = get_http_client()
         self.headers = {
             "Accept": "application/vnd.github.v3+json",
             "Authorization": f"token {token}",
@@ -36,7 +38,7 @@ class IssuesCleaner:
             try:
                 # 获取带有rss-item标签的issues
                 url = f"{self.base_url}/issues?labels=rss-item&state=all&per_page=100&page={page}"
-                response = requests.get(url, headers=self.headers, timeout=10)
+                response = self.http_client.get(url, headers=self.headers, timeout=10)
                 
                 if response.status_code != 200:
                     print(f"❌ 获取Issues失败: {response.status_code}")
@@ -61,7 +63,7 @@ class IssuesCleaner:
         try:
             url = f"{self.base_url}/issues/{issue_number}"
             data = {"state": "closed"}
-            response = requests.patch(url, json=data, headers=self.headers, timeout=10)
+            response = self.http_client.patch(url, json=data, headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 return True
@@ -87,7 +89,7 @@ class IssuesCleaner:
             # 添加"deleted"标签（使用正确的格式）
             url = f"{self.base_url}/issues/{issue_number}/labels"
             # 注意：这里会创建标签如果它不存在
-            response = requests.post(url, json=["deleted"], headers=self.headers, timeout=10)
+            response = self.http_client.post(url, json=["deleted"], headers=self.headers, timeout=10)
             
             if response.status_code in [200, 201]:
                 return True
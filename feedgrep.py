@@ -1,13 +1,30 @@
 import yaml
-import sqlite3
 import schedule
 import time
-import feedparser
+import random
+import json
 import argparse
+import os
 import sys
 import threading
-from typing import List, Dict
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Optional, Iterable
 from utils.Logger import get_logger
+from utils.archive import ItemArchive
+from utils.batch_runs import BatchRunRecorder, BatchRunStats
+from utils.content import ContentSettings, encode_content, html_to_text, make_snippet
+from utils.db import get_database, item_fingerprint
+from utils.migrations import DEFAULT_CHUNK_SIZE, migrate
+from utils.feed_cache import DEFAULT_CONTENT_TYPES, SQLiteValidatorStore, conditional_fetch
+from utils.http_client import configure_http_client
+from utils.feed_health import FeedHealthTracker
+from utils.feed_parser import ENGINE_FAST, parse_feed, iter_feed, iter_items
+from utils.scheduler import AdaptiveFeedScheduler, estimate_interval
+from utils.keywords import KeywordMatcher, backfill_keyword_matches
+from utils.search import index_text_rows, rebuild_fts_index
+from utils.seen_filter import SeenFilter
 
 # 初始化全局日志记录器
 log = get_logger(__name__)
@@ -26,11 +43,28 @@ class FeedGrepProcessor:
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = yaml.safe_load(f)
         
-        # 初始化数据库
+        # 初始化数据库（进程内共享的WAL连接）
         self.db_path = db_path
+        self.db = get_database(db_path, self.config)
         self.init_database()
         
-        # 初始化批处理ID
+        # 初始化已保存条目的内存过滤器，大部分已存在的条目不必查询数据库
+        self.seen_filter = SeenFilter(self.config)
+        if self.seen_filter.enabled:
+            self.warm_seen_filter()
+        
+        # 初始化共享的HTTP客户端（按主机复用连接并限流）
+        self.http_client = configure_http_client(self.config)
+        
+        # 初始化RSS源的HTTP校验信息存储（ETag/Last-Modified/内容哈希）
+        self.validator_store = SQLiteValidatorStore(db_path, self.config)
+        
+        # 初始化RSS源健康状态记录（失败的源按指数退避熔断）
+        self.health = FeedHealthTracker(db_path, self.config)
+        
+        # 初始化批次记录和批处理ID
+        self.batch_runs = BatchRunRecorder(self.db)
+        self.batch_stats = BatchRunStats()
         self.current_batch_id = self.get_next_batch_id()
         
         # 初始化推送管理器
@@ -39,224 +73,388 @@ class FeedGrepProcessor:
         
         # 存储每个源的新条目用于推送
         self.feed_new_items = {}
-    
-    def init_database(self):
-        """初始化数据库表"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 创建表来存储RSS条目
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS feedgrep_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT,
-                link TEXT,
-                description TEXT,
-                pub_date TEXT,
-                guid TEXT,
-                category TEXT,
-                source_name TEXT,
-                batch_id INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
         
-        # 创建索引来提高查询速度
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_title ON feedgrep_items(title)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_guid ON feedgrep_items(guid)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_link ON feedgrep_items(link)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON feedgrep_items(category)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_source_name ON feedgrep_items(source_name)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_batch_id ON feedgrep_items(batch_id)')
+        # 摘要长度和完整内容压缩设置
+        self.content_settings = ContentSettings(self.config)
         
-        # 为 is_item_exists 方法添加复合索引
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_source_title_link_guid ON feedgrep_items(source_name, title, link, guid)')
+        # 条目保留策略和归档
+        self.archive = ItemArchive(self.db, self.config)
         
-        # 为关键词搜索添加复合索引
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_created_at ON feedgrep_items(created_at DESC)')
+        # 关键词规则只编译一次，条目写入时即判断匹配的规则并记录到keyword_matches表
+        self.keyword_matcher = KeywordMatcher.from_config(self.config)
         
-        # 为分类和时间组合查询添加索引
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_category_created_at ON feedgrep_items(category, created_at DESC)')
+        # 自适应调度器（启动调度后创建）
+        self.scheduler = None
         
-        # 为来源和时间组合查询添加索引
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_source_name_created_at ON feedgrep_items(source_name, created_at DESC)')
-        
-        # 不再创建新的batch_counter表，改用配置文件方式存储batch_id
-        
-        conn.commit()
-        conn.close()
+        # 解析用的进程池（启用时首次解析前创建）
+        self.parse_pool = None
+        self.parse_pool_disabled = False
+        self.parse_pool_lock = threading.Lock()
+    
+    def init_database(self):
+        """初始化数据库表（按版本执行结构迁移）"""
+        version = migrate(self.db, self.config)
+        log.debug(f"Database schema version: {version}")
+    
+    def warm_seen_filter(self):
+        """从数据库加载已有条目的指纹，最近写入的条目进入精确缓存"""
+        try:
+            with self.db.reader() as conn:
+                count = conn.execute('''
+                    SELECT (SELECT COUNT(item_hash) FROM feedgrep_items) + (SELECT COUNT(*) FROM archived_item_hashes)
+                ''').fetchone()[0]
+                # 已归档条目的指纹排在前面，最近写入的条目最后加入精确缓存
+                archived = conn.execute('SELECT item_hash FROM archived_item_hashes')
+                rows = conn.execute('SELECT item_hash FROM feedgrep_items WHERE item_hash IS NOT NULL ORDER BY id')
+                self.seen_filter.warm((row[0] for cursor in (archived, rows) for row in cursor), count)
+        except Exception as e:
+            log.error(f"Error warming seen filter, falling back to database lookups: {e}")
+            self.seen_filter.enabled = False
     
     def get_next_batch_id(self) -> int:
         """
-        获取下一个批处理ID，并将其加1
+        获取下一个批处理ID（不创建批次记录）
         
         Returns:
             下一个批处理ID
         """
-        # 使用feedgrep_items表中的最大batch_id作为当前batch_id，然后加1
+        # 批处理ID由batch_runs表的自增序列分配，读取序列当前值即可
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # 获取当前最大的batch_id
-            cursor.execute('SELECT COALESCE(MAX(batch_id), 0) FROM feedgrep_items')
-            max_batch_id = cursor.fetchone()[0]
-            
-            conn.close()
-            
-            # 下一个batch_id应该是最大值加1，最小为1
-            return max(1, max_batch_id + 1)
-            
+            return self.batch_runs.peek_next_id()
         except Exception as e:
             log.error(f"Error getting next batch ID: {e}")
             return 1
     
-    def fetch_rss_feed(self, url: str) -> List[Dict]:
+    def fetch_feed(self, url: str, timeout: Optional[float] = None, engine: Optional[str] = None) -> Dict:
         """
-        获取并解析RSS源
+        获取并解析RSS源，使用条件请求跳过未更新的源
         
         Args:
             url: RSS源地址
+            timeout: 请求超时时间（秒），为空时使用配置中的默认值
+            engine: 解析引擎（feedparser或fast），为空时使用配置中的默认值
             
         Returns:
-            解析后的RSS条目列表
+            抓取结果字典，包含：
+                url: RSS源地址
+                not_modified: 内容是否未更新（304或内容哈希相同）
+                items: 解析后的RSS条目（按源中顺序逐条生成的迭代器）
+                validators: 处理完成后需要保存的校验信息，抓取失败时为None
+                error: 错误信息，成功时为None
+                elapsed: 抓取耗时（秒）
+                bytes_transferred: 实际传输的字节数（压缩后）
+                bytes_decompressed: 解压后的字节数
         """
+        fetch_config = self.config.get('fetch', {})
+        if timeout is None:
+            timeout = fetch_config.get('timeout', 30)
+        
+        result = {
+            'url': url,
+            'not_modified': False,
+            'items': [],
+            'validators': None,
+            'error': None,
+            'elapsed': 0.0,
+            'bytes_transferred': 0,
+            'bytes_decompressed': 0
+        }
+        stats = self.batch_stats
+        start = time.monotonic()
         try:
-            # 设置feedparser的超时和代理（如果需要）
-            import socket
-            socket.setdefaulttimeout(30)
-            feed = feedparser.parse(url)
-            items = []
-            
-            for entry in feed.entries:
-                # 提取关键字段
-                item = {
-                    'title': getattr(entry, 'title', ''),
-                    'link': getattr(entry, 'link', ''),
-                    'description': getattr(entry, 'summary', ''),
-                    'pub_date': getattr(entry, 'published', ''),
-                    'guid': getattr(entry, 'id', getattr(entry, 'link', ''))
-                }
-                
-                items.append(item)
+            cached = self.validator_store.get(url) if fetch_config.get('conditional_get', True) else None
+            # 使用单次请求的超时，而不是修改进程级别的socket默认超时
+            with stats.timer('fetch'):
+                response = conditional_fetch(
+                    url,
+                    cached,
+                    timeout,
+                    session=self.http_client,
+                    max_bytes=fetch_config.get('max_bytes', 5 * 1024 * 1024),
+                    allowed_content_types=fetch_config.get('allowed_content_types', DEFAULT_CONTENT_TYPES)
+                )
             
-            return items
+            result['bytes_transferred'] = response['bytes_transferred']
+            result['bytes_decompressed'] = response['bytes_decompressed']
+            result['not_modified'] = response['not_modified']
+            result['validators'] = response['validators']
+            if not response['not_modified']:
+                # 按需解析时解析发生在取条目时，一并计入解析耗时
+                with stats.timer('parse'):
+                    rows = self.parse_feed_rows(
+                        response['content'], engine, response['url'], response['content_type']
+                    )
+                result['items'] = stats.timed_iter(iter_items(rows), 'parse')
         except Exception as e:
             log.error(f"Error fetching RSS feed from {url}: {e}")
-            return []
+            result['error'] = str(e)
+        
+        result['elapsed'] = time.monotonic() - start
+        return result
     
-    def is_item_exists(self, guid: str, link: str, title: str, source_name: str) -> bool:
+    def fetch_rss_feed(self, url: str, timeout: Optional[float] = None) -> List[Dict]:
         """
-        检查条目是否已存在
+        获取并解析RSS源
+        
+        Args:
+            url: RSS源地址
+            timeout: 请求超时时间（秒），为空时使用配置中的默认值
+            
+        Returns:
+            解析后的RSS条目列表，源未更新或抓取失败时为空列表
+        """
+        return list(self.fetch_feed(url, timeout)['items'])
+    
+    def parse_feed_content(self, content: bytes) -> List[Dict]:
+        """
+        解析RSS源内容
         
         Args:
-            guid: 条目的GUID
-            link: 条目的链接
-            title: 条目的标题
-            source_name: 条目来源名称
+            content: RSS源响应内容
             
         Returns:
-            如果条目已存在返回True，否则返回False
+            解析后的RSS条目列表
+        """
+        return list(iter_items(self.parse_feed_rows(content)))
+    
+    def parse_feed_rows(self, content: bytes, engine: Optional[str] = None, url: Optional[str] = None,
+                        content_type: Optional[str] = None) -> Iterable[tuple]:
+        """
+        解析RSS源内容为紧凑的条目元组
+        
+        启用进程池解析时，解析在子进程中进行，不占用调度线程和API服务所在进程的GIL；
+        进程池不可用时退回当前线程解析。fast引擎在当前线程解析时按需逐条解析，
+        增量处理提前停止后不再解析剩余内容。
+        
+        Args:
+            content: RSS源响应内容
+            engine: 解析引擎（feedparser或fast），为空时使用配置中的默认值
+            url: 响应的最终地址，用于解析相对链接
+            content_type: 响应的Content-Type，用于确定字符集
+            
+        Returns:
+            条目元组，字段顺序见utils.feed_parser.ITEM_FIELDS
         """
-        max_retries = 3
-        for attempt in range(max_retries):
+        if engine is None:
+            engine = self.config.get('parse', {}).get('engine', 'feedparser')
+        
+        parse_pool = self.get_parse_pool()
+        if parse_pool is not None:
             try:
-                conn = sqlite3.connect(self.db_path, timeout=20.0)
-                cursor = conn.cursor()
-
-                cursor.execute(
-                    'SELECT COUNT(*) FROM feedgrep_items WHERE source_name = ? AND title = ? AND link = ?',
-                    (source_name, title, link)
+                return parse_pool.submit(parse_feed, content, engine, url, content_type).result()
+            except BrokenProcessPool as e:
+                log.error(f"Parse process pool is broken, parsing in current thread: {e}")
+                self.parse_pool = None
+                self.parse_pool_disabled = True
+        
+        if engine == ENGINE_FAST:
+            return iter_feed(content, engine, url, content_type)
+        return parse_feed(content, engine, url, content_type)
+    
+    def get_parse_pool(self) -> Optional[ProcessPoolExecutor]:
+        """
+        获取解析用的进程池，未启用时返回None
+        
+        Returns:
+            进程池，首次调用时创建
+        """
+        parse_config = self.config.get('parse', {})
+        if not parse_config.get('process_pool', False) or self.parse_pool_disabled:
+            return None
+        
+        with self.parse_pool_lock:
+            if self.parse_pool is None:
+                workers = parse_config.get('workers') or os.cpu_count() or 1
+                # 使用spawn启动子进程，避免在已有线程（调度器、API服务）的进程中fork
+                self.parse_pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn')
                 )
-                count = cursor.fetchone()[0]
-                
-                conn.close()
-                return count > 0
-            except sqlite3.OperationalError as e:
-                if "database is locked" in str(e) and attempt < max_retries - 1:
-                    time.sleep(1)
-                    continue
-                else:
-                    log.error(f"Error checking item existence after {attempt+1} attempts: {e}")
-                    if 'conn' in locals():
-                        conn.close()
-                    return False
-            except Exception as e:
-                log.error(f"Unexpected error checking item existence: {e}")
-                if 'conn' in locals():
-                    conn.close()
-                return False
-        return False
+                log.info(f"Parse process pool started with {workers} workers.")
+            return self.parse_pool
+    
+    def is_item_exists(self, item_hash: int) -> bool:
+        """
+        检查条目是否已存在
+        
+        Args:
+            item_hash: 条目指纹，见item_fingerprint
+            
+        Returns:
+            如果条目已存在返回True，否则返回False
+        """
+        if self.seen_filter.enabled:
+            known = self.seen_filter.contains(item_hash)
+            if known is not None:
+                return known
+        
+        try:
+            with self.db.reader() as conn:
+                # 已归档的条目同样视为已存在
+                row = conn.execute(
+                    'SELECT 1 FROM feedgrep_items WHERE item_hash = ? '
+                    'UNION ALL SELECT 1 FROM archived_item_hashes WHERE item_hash = ?',
+                    (item_hash, item_hash)
+                ).fetchone()
+            if self.seen_filter.enabled:
+                self.seen_filter.record_lookup(item_hash, row is not None)
+            return row is not None
+        except Exception as e:
+            log.error(f"Unexpected error checking item existence: {e}")
+            return False
     
-    def save_item(self, item: Dict, category: str, source_name: str) -> bool:
+    def insert_items(self, items: List[Dict], category: str, source_name: str) -> List[Dict]:
         """
-        保存单个RSS条目到数据库
+        在一个事务中批量写入RSS条目及其匹配的关键词规则，已存在的条目（指纹冲突）直接忽略
+        
+        条目表的description只保存截断后的纯文本摘要，完整内容（可压缩）写入feedgrep_item_content表；
+        关键词按标题和完整内容的纯文本匹配，全文索引也写入同样的纯文本。
         
         Args:
-            item: RSS条目字典
+            items: RSS条目字典列表，需包含item_hash字段
             category: 条目所属类别
             source_name: RSS源名称
             
         Returns:
-            保存成功返回True，否则返回False
+            实际写入的条目，按传入顺序排列（带有写入后的id）
+            
+        Raises:
+            sqlite3.Error: 写入失败（事务已回滚），由调用方决定是否推进该源的增量位置和校验信息
         """
-        # 检查条目是否已存在
-        if self.is_item_exists(item['guid'], item['link'], item['title'], source_name):
-            return False  # 条目已存在，不需要保存
+        if not items:
+            return []
         
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                conn = sqlite3.connect(self.db_path, timeout=20.0)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO feedgrep_items (title, link, description, pub_date, guid, category, source_name, batch_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    item['title'],
-                    item['link'],
-                    item['description'],
-                    item['pub_date'],
-                    item['guid'],
-                    category,
-                    source_name,
-                    self.current_batch_id
-                ))
-                
-                conn.commit()
-                conn.close()
-                
+        # 在事务外完成摘要、压缩和关键词匹配，写锁只在写入时持有
+        prepared = {}
+        for item in items:
+            text = html_to_text(item['description'])
+            prepared[item['item_hash']] = (
+                make_snippet(text, self.content_settings.snippet_length),
+                encode_content(item['description'], self.content_settings),
+                [rule.rule_id for rule in self.keyword_matcher.match(item['title'], text)],
+                (item['title'], text)
+            )
+        
+        with self.db.transaction() as conn:
+            # 先取得写锁再读取最大ID，其他进程（如单独运行的抓取命令）不能在两次读取之间写入；
+            # 新增的行按ID和本批条目的指纹一起确定
+            conn.execute('BEGIN IMMEDIATE')
+            last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM feedgrep_items').fetchone()[0]
+            conn.executemany('''
+                INSERT OR IGNORE INTO feedgrep_items
+                    (title, link, description, pub_date, guid, category, source_name, batch_id, item_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(
+                item['title'],
+                item['link'],
+                prepared[item['item_hash']][0],
+                item['pub_date'],
+                item['guid'],
+                category,
+                source_name,
+                self.current_batch_id,
+                item['item_hash']
+            ) for item in items])
+            inserted = {
+                row[1]: row[0] for row in conn.execute(
+                    'SELECT id, item_hash FROM feedgrep_items '
+                    'WHERE id > ? AND item_hash IN (SELECT value FROM json_each(?))',
+                    (last_id, json.dumps(list(prepared)))
+                )
+            }
+            
+            # 与条目在同一事务中写入完整内容、全文索引和匹配的关键词规则
+            conn.executemany(
+                'INSERT OR REPLACE INTO feedgrep_item_content (item_id, encoding, content) VALUES (?, ?, ?)',
+                [(item_id, *prepared[item_hash][1]) for item_hash, item_id in inserted.items()]
+            )
+            index_text_rows(conn, [
+                (item_id, *prepared[item_hash][3]) for item_hash, item_id in inserted.items()
+            ])
+            conn.executemany(
+                'INSERT OR IGNORE INTO keyword_matches (rule_id, item_id, batch_id) VALUES (?, ?, ?)',
+                [
+                    (rule_id, item_id, self.current_batch_id)
+                    for item_hash, item_id in inserted.items()
+                    for rule_id in prepared[item_hash][2]
+                ]
+            )
+        
+        # 被忽略的条目也已在数据库中，一并加入过滤器
+        if self.seen_filter.enabled:
+            self.seen_filter.add_many(item['item_hash'] for item in items)
+        
+        new_items = []
+        for item in items:
+            if item['item_hash'] in inserted:
+                # 同一批中重复的条目只算一次
+                item['id'] = inserted.pop(item['item_hash'])
+                item['description'] = prepared[item['item_hash']][0]
+                item['category'] = category
+                item['source_name'] = source_name
+                new_items.append(item)
                 log.info(f"[{category} - {source_name}] Saved new item: {item['title']}")
-                
-                # 记录新条目用于推送
-                if source_name not in self.feed_new_items:
-                    self.feed_new_items[source_name] = []
-                self.feed_new_items[source_name].append(item)
-                
-                return True
-            except sqlite3.OperationalError as e:
-                if "database is locked" in str(e) and attempt < max_retries - 1:
-                    time.sleep(1)
-                    continue
-                else:
-                    log.error(f"Error saving item after {attempt+1} attempts: {e}")
-                    if 'conn' in locals():
-                        conn.close()
-                    return False
-            except sqlite3.IntegrityError:
-                # 可能是唯一约束冲突（并发情况下）
-                if 'conn' in locals():
-                    conn.close()
-                return False
-            except Exception as e:
-                log.error(f"Unexpected error saving item: {e}")
-                if 'conn' in locals():
-                    conn.close()
-                return False
-        return False
+        
+        # 记录新条目用于推送
+        if new_items:
+            self.feed_new_items.setdefault(source_name, []).extend(new_items)
+        
+        return new_items
+    
+    def get_watermark(self, source_name: str) -> Optional[Dict]:
+        """
+        获取RSS源的增量处理位置
+        
+        Args:
+            source_name: RSS源名称
+            
+        Returns:
+            包含latest_guid、latest_pub_date、runs_since_full_scan和unstable的字典，没有记录时返回None
+        """
+        try:
+            with self.db.reader() as conn:
+                row = conn.execute(
+                    'SELECT latest_guid, latest_pub_date, runs_since_full_scan, unstable FROM feed_watermarks WHERE source_name = ?',
+                    (source_name,)
+                ).fetchone()
+            return dict(row) if row else None
+        except Exception as e:
+            log.error(f"Error loading watermark for {source_name}: {e}")
+            return None
+    
+    def save_watermark(self, source_name: str, newest_item: Dict, full_scan: bool, unstable: bool):
+        """
+        记录RSS源的增量处理位置
+        
+        Args:
+            source_name: RSS源名称
+            newest_item: 本次处理时源中的第一条条目
+            full_scan: 本次是否为全量扫描
+            unstable: 本次是否发现排序不稳定
+        """
+        try:
+            with self.db.transaction() as conn:
+                conn.execute('''
+                INSERT INTO feed_watermarks (source_name, latest_guid, latest_pub_date, runs_since_full_scan, unstable, updated_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(source_name) DO UPDATE SET
+                    latest_guid = excluded.latest_guid,
+                    latest_pub_date = excluded.latest_pub_date,
+                    runs_since_full_scan = CASE WHEN ? THEN 0 ELSE feed_watermarks.runs_since_full_scan + 1 END,
+                    unstable = MAX(feed_watermarks.unstable, excluded.unstable),
+                    updated_at = CURRENT_TIMESTAMP
+            ''', (
+                source_name,
+                newest_item['guid'],
+                newest_item['pub_date'],
+                0,
+                int(unstable),
+                int(full_scan)
+            ))
+        except Exception as e:
+            log.error(f"Error saving watermark for {source_name}: {e}")
     
-    def process_feed(self, url: str, category: str, source_name: str):
+    def process_feed(self, url: str, category: str, source_name: str, timeout: Optional[float] = None):
         """
         处理单个RSS源
         
@@ -264,14 +462,120 @@ class FeedGrepProcessor:
             url: RSS源地址
             category: RSS源所属类别
             source_name: RSS源名称
+            timeout: 请求超时时间（秒）
         """
+        if not self.health.allow_request(url):
+            log.info(f"Feed {source_name} is backing off after repeated failures, skipped.")
+            return
+        
         log.info(f"Processing feed: {source_name} ({url}) - Category: {category}")
-        items = self.fetch_rss_feed(url)
+        result = self.fetch_feed(url, timeout)
+        self.handle_fetch_result(result, category, source_name)
+    
+    def handle_fetch_result(self, result: Dict, category: str, source_name: str):
+        """
+        处理单个RSS源的抓取结果：未更新的源直接跳过，其余保存条目后再记录校验信息
+        
+        Args:
+            result: fetch_feed返回的抓取结果
+            category: RSS源所属类别
+            source_name: RSS源名称
+        """
+        if result['error']:
+            self.batch_stats.count('feeds_failed')
+            self.health.record_failure(result['url'], source_name, result['error'], result['elapsed'])
+            return
         
-        new_items_count = 0
+        self.batch_stats.count('feeds_succeeded')
+        self.health.record_success(
+            result['url'],
+            source_name,
+            result['elapsed'],
+            result['bytes_transferred'],
+            result['bytes_decompressed']
+        )
+        
+        saved = True
+        if result['not_modified']:
+            self.batch_stats.count('feeds_not_modified')
+            log.info(f"Feed {source_name} not modified, skipped.")
+        else:
+            saved = self.save_feed_items(result['items'], category, source_name)
+        
+        # 条目保存成功后再更新校验信息，保存失败时不记录，下次抓取不会被误判为未更新
+        if result['validators'] and saved:
+            self.validator_store.set(result['url'], result['validators'])
+    
+    def save_feed_items(self, items: Iterable[Dict], category: str, source_name: str) -> bool:
+        """
+        保存单个RSS源抓取到的条目，并推送新内容
+        
+        启用增量模式时，条目按源中的顺序（通常为从新到旧）逐条处理：遇到上次记录的最新条目，
+        或连续遇到若干条已存在的条目后即停止，不再检查更旧的条目。每隔若干次做一次全量扫描，
+        如果发现已存在的条目之后还有新条目，说明该源的排序不稳定，之后改为始终全量扫描。
+        新条目收集完后在一个事务中批量写入。
+        
+        Args:
+            items: 抓取到的RSS条目
+            category: RSS源所属类别
+            source_name: RSS源名称
+            
+        Returns:
+            条目是否保存成功，写入失败时不更新增量位置，返回False
+        """
+        incremental_config = self.config.get('incremental', {})
+        stop_after_known = max(1, incremental_config.get('stop_after_known', 3))
+        watermark = self.get_watermark(source_name)
+        full_scan = (
+            not incremental_config.get('enabled', True)
+            or watermark is None
+            or watermark['unstable']
+            or watermark['runs_since_full_scan'] + 1 >= incremental_config.get('verify_every', 10)
+        )
+        
+        pending = []
+        known_streak = 0
+        unstable = False
+        newest_item = None
         for item in items:
-            if self.save_item(item, category, source_name):
-                new_items_count += 1
+            self.batch_stats.count('items_fetched')
+            if newest_item is None:
+                newest_item = item
+            
+            # 增量模式下遇到上次记录的最新条目，说明之后的条目都已处理过；
+            # 没有guid的源（guid为空）无法据此定位，只靠连续的已存在条目停止
+            if not full_scan and watermark['latest_guid'] and item['guid'] == watermark['latest_guid']:
+                break
+            
+            item['item_hash'] = item_fingerprint(source_name, item['title'], item['link'])
+            with self.batch_stats.timer('dedup'):
+                exists = self.is_item_exists(item['item_hash'])
+            if exists:
+                known_streak += 1
+                if not full_scan and known_streak >= stop_after_known:
+                    break
+                continue
+            
+            # 连续出现已存在的条目后又出现新条目，增量模式会漏掉它
+            if known_streak >= stop_after_known:
+                unstable = True
+            known_streak = 0
+            
+            pending.append(item)
+        
+        with self.batch_stats.timer('insert'):
+            try:
+                new_items_count = len(self.insert_items(pending, category, source_name))
+            except Exception as e:
+                # 不记录增量位置，下次抓取时重新处理这些条目
+                log.error(f"Unexpected error saving items for {source_name}: {e}")
+                return False
+        self.batch_stats.count('items_inserted', new_items_count)
+        
+        if newest_item is not None:
+            if unstable:
+                log.warning(f"Feed {source_name} is not ordered newest first, falling back to full scans.")
+            self.save_watermark(source_name, newest_item, full_scan, unstable)
         
         log.info(f"Feed {source_name} processed. {new_items_count} new items saved.")
         
@@ -297,65 +601,139 @@ class FeedGrepProcessor:
                     if len(content) > 20000:
                         content += f"\n... 还有更多内容（共{new_items_count}条）"
                         break
-                        
-                self.push_manager.send_bulk_push(push_channels, title, content)
+                
+                with self.batch_stats.timer('push'):
+                    self.push_manager.send_bulk_push(push_channels, title, content)
+        
+        return True
+    
+    def get_feed_tasks(self) -> List[Dict]:
+        """
+        按配置文件中的顺序列出所有需要抓取的RSS源
+        
+        Returns:
+            RSS源任务列表，每项包含category、source_name、url、timeout、parser以及调度间隔配置
+        """
+        default_timeout = self.config.get('fetch', {}).get('timeout', 30)
+        tasks = []
+        
+        categories = self.config.get('categories', {})
+        for category, feeds in categories.items():
+            for feed in feeds or []:
+                url = feed.get('url', '')
+                if url:
+                    tasks.append({
+                        'category': category,
+                        'source_name': feed.get('name', 'Unknown'),
+                        'url': url,
+                        'timeout': feed.get('timeout', default_timeout),
+                        'parser': feed.get('parser'),
+                        'interval_minutes': feed.get('interval_minutes'),
+                        'min_interval_minutes': feed.get('min_interval_minutes'),
+                        'max_interval_minutes': feed.get('max_interval_minutes')
+                    })
+        
+        return tasks
     
     def process_all_feeds(self):
         """处理所有配置的RSS源"""
         log.info("Starting to process all feeds...")
+        self.process_feeds(self.get_feed_tasks())
+        log.info("All feeds processed.")
+    
+    def process_feeds(self, tasks: List[Dict]):
+        """
+        以一个批次处理指定的RSS源
         
-        # 生成新的批处理ID
-        self.current_batch_id = self.get_next_batch_id()
+        Args:
+            tasks: RSS源任务列表，格式同get_feed_tasks的返回值
+        """
+        # 创建批次记录，生成新的批处理ID
+        self.current_batch_id = self.batch_runs.start()
+        self.batch_stats = BatchRunStats()
+        batch_start = time.monotonic()
         log.info(f"Starting batch processing with batch_id: {self.current_batch_id}")
         
+        try:
+            self.run_batch(tasks)
+        finally:
+            duration = time.monotonic() - batch_start
+            try:
+                self.batch_runs.finish(self.current_batch_id, self.batch_stats, duration)
+            except Exception as e:
+                log.error(f"Error recording batch run {self.current_batch_id}: {e}")
+            # 批次写入了新条目时递增数据版本，使API的响应缓存失效
+            if self.batch_stats.counters['items_inserted']:
+                try:
+                    self.db.bump_data_version()
+                except Exception as e:
+                    log.error(f"Error bumping data version: {e}")
+            log.info(f"Batch {self.current_batch_id} finished in {duration:.1f}s: {self.batch_stats.counters}")
+    
+    def run_batch(self, tasks: List[Dict]):
+        """
+        抓取、保存并推送一个批次的RSS源（批处理ID和批次统计已由process_feeds准备好）
+        
+        Args:
+            tasks: RSS源任务列表，格式同get_feed_tasks的返回值
+        """
         # 清空之前的新条目记录
         self.feed_new_items = {}
         
-        # 处理分类的RSS源
-        categories = self.config.get('categories', {})
-        for category, feeds in categories.items():
-            for feed in feeds:
-                source_name = feed.get('name', 'Unknown')
-                url = feed.get('url', '')
-                if url:
-                    try:
-                        self.process_feed(url, category, source_name)
-                    except Exception as e:
-                        log.error(f"Failed to process feed {source_name} ({url}): {e}")
+        max_workers = max(1, self.config.get('fetch', {}).get('max_workers', 8))
+        
+        # 跳过熔断退避期内的RSS源，避免反复等待超时
+        allowed_tasks = []
+        for task in tasks:
+            if self.health.allow_request(task['url']):
+                allowed_tasks.append(task)
+            else:
+                self.batch_stats.count('feeds_skipped')
+                log.info(f"Feed {task['source_name']} is backing off after repeated failures, skipped.")
+        tasks = allowed_tasks
+        self.batch_stats.count('feeds_attempted', len(tasks))
+        
+        # 抓取阶段并发执行，写入阶段在当前线程按任务列表顺序依次提交，
+        # 保证batch_id语义和推送顺序与串行处理时一致
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='feedgrep-fetch') as executor:
+            futures = []
+            for task in tasks:
+                log.info(f"Processing feed: {task['source_name']} ({task['url']}) - Category: {task['category']}")
+                futures.append(executor.submit(self.fetch_feed, task['url'], task['timeout'], task.get('parser')))
+            
+            for task, future in zip(tasks, futures):
+                try:
+                    self.handle_fetch_result(future.result(), task['category'], task['source_name'])
+                except Exception as e:
+                    log.error(f"Failed to process feed {task['source_name']} ({task['url']}): {e}")
+        
+        if self.seen_filter.enabled:
+            log.info(f"Seen filter stats: {self.seen_filter.stats()}")
         
         # 处理关键词推送
-        self.process_keyword_pushes()
+        with self.batch_stats.timer('push'):
+            self.process_keyword_pushes()
         
-        log.info("All feeds processed.")
+        # 按保留策略归档过期条目（距上次执行超过interval_hours时）
+        try:
+            self.archive.run_if_due()
+        except Exception as e:
+            log.error(f"Error applying retention policy: {e}")
 
     def process_keyword_pushes(self):
         """处理基于关键词的推送"""
         if not self.push_manager.push_enabled:
             return
-            
-        # 获取默认关键词配置
-        default_keywords = self.config.get('default_keywords', [])
-        
-        # 遍历每个关键词配置
-        for i, keyword_config in enumerate(default_keywords):
-            # 检查是否有针对此关键词的推送配置
-            keyword_push_config = None
-            if isinstance(keyword_config, dict):
-                keyword_push_config = keyword_config
-                keyword_expr = keyword_config.get('keywords', '')
-            else:
-                keyword_expr = keyword_config
-                
-            # 如果没有推送配置，跳过
-            if isinstance(keyword_push_config, dict) and 'push_channels' not in keyword_push_config:
-                continue
-                
-            push_channels = keyword_push_config.get('push_channels', []) if isinstance(keyword_push_config, dict) else []
+        
+        # 遍历每条关键词规则，没有推送渠道的规则跳过
+        for rule in self.keyword_matcher.rules:
+            push_channels = rule.push_channels
             if not push_channels:
                 continue
+            keyword_expr = rule.expression
             
-            # 搜索匹配该关键词的内容
-            matched_items = self.search_items_by_keyword(keyword_expr)
+            # 本批次写入时已匹配该规则的条目
+            matched_items = self.get_rule_items(rule.rule_id, self.current_batch_id)
             
             # 如果有匹配的内容，则发送推送
             if matched_items:
@@ -375,77 +753,92 @@ class FeedGrepProcessor:
                 # 发送推送
                 self.push_manager.send_bulk_push(push_channels, title, content)
 
-    def search_items_by_keyword(self, keyword):
+    def get_rule_items(self, rule_id: str, batch_id: int) -> List[Dict]:
         """
-        根据关键词搜索新条目
+        获取某个批次中匹配关键词规则的条目
         
         Args:
-            keyword: 关键词表达式
+            rule_id: 关键词规则ID
+            batch_id: 批处理ID
             
         Returns:
-            匹配的条目列表
+            匹配的条目列表，最新的在前
         """
         try:
-            # 解析关键词语法
-            required_keywords = []  # 必须包含的关键词 (+)
-            excluded_keywords = []  # 必须排除的关键词 (-)
-            normal_keywords = []    # 普通关键词 (空格分隔)
-            
-            # 解析关键词
-            parts = keyword.split()
-            for part in parts:
-                if part.startswith('+'):
-                    required_keywords.append(part[1:])  # 去掉+号
-                elif part.startswith('-'):
-                    excluded_keywords.append(part[1:])  # 去掉-号
-                else:
-                    normal_keywords.append(part)
-
-            # 构建查询语句
-            query_conditions = ["batch_id = ?"]  # 只查找当前批次的新内容
-            params = [self.current_batch_id]
-            
-            # 处理普通关键词 (OR关系)
-            if normal_keywords:
-                or_conditions = []
-                for kw in normal_keywords:
-                    or_conditions.append("(title LIKE ? OR description LIKE ?)")
-                    params.extend([f"%{kw}%", f"%{kw}%"])
-                query_conditions.append("(" + " OR ".join(or_conditions) + ")")
-            
-            # 处理必须关键词 (AND关系)
-            for kw in required_keywords:
-                query_conditions.append("(title LIKE ? OR description LIKE ?)")
-                params.extend([f"%{kw}%", f"%{kw}%"])
-            
-            # 处理排除关键词
-            for kw in excluded_keywords:
-                query_conditions.append("(title NOT LIKE ? AND description NOT LIKE ?)")
-                params.extend([f"%{kw}%", f"%{kw}%"])
-            
-            # 基础查询
-            query = "SELECT * FROM feedgrep_items WHERE " + " AND ".join(query_conditions)
-            query += " ORDER BY created_at DESC"
-            
-            # 执行查询
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # 使结果可以通过列名访问
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            
-            # 获取结果
-            rows = cursor.fetchall()
-            items = [dict(row) for row in rows]
-            
-            conn.close()
+            with self.db.reader() as conn:
+                rows = conn.execute('''
+                    SELECT i.* FROM keyword_matches m
+                    JOIN feedgrep_items i ON i.id = m.item_id
+                    WHERE m.rule_id = ? AND m.batch_id = ?
+                    ORDER BY m.item_id DESC
+                ''', (rule_id, batch_id)).fetchall()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            log.error(f"Error loading items for keyword rule '{rule_id}': {e}")
+            return []
+    
+    def get_new_item_history(self, source_name: str, limit: int) -> List[float]:
+        """
+        获取RSS源最近几次出现新条目的时间
+        
+        Args:
+            source_name: RSS源名称
+            limit: 最多返回的批次数
             
-            return items
+        Returns:
+            每个出现新条目的批次的入库时间戳（UTC）
+        """
+        try:
+            with self.db.reader() as conn:
+                rows = conn.execute('''
+                    SELECT MIN(strftime('%s', created_at)) FROM feedgrep_items
+                    WHERE source_name = ?
+                    GROUP BY batch_id
+                    ORDER BY batch_id DESC
+                    LIMIT ?
+                ''', (source_name, limit)).fetchall()
+            return [float(row[0]) for row in rows if row[0] is not None]
         except Exception as e:
-            log.error(f"搜索关键词 '{keyword}' 时出错: {e}")
+            log.error(f"Error loading item history for {source_name}: {e}")
             return []
     
+    def get_feed_interval(self, task: Dict) -> float:
+        """
+        计算RSS源的下一次抓取间隔
+        
+        RSS源配置了interval_minutes时使用固定间隔，否则根据历史更新节奏估算，
+        并限制在该源（或全局）的min_interval_minutes和max_interval_minutes之间。
+        
+        Args:
+            task: RSS源任务信息
+            
+        Returns:
+            抓取间隔（秒）
+        """
+        scheduler_config = self.config.get('scheduler', {})
+        default_interval = self.config.get('interval_minutes', 30) * 60
+        if task.get('interval_minutes'):
+            return task['interval_minutes'] * 60
+        
+        min_interval = (task.get('min_interval_minutes') or scheduler_config.get('min_interval_minutes', 5)) * 60
+        max_interval = (task.get('max_interval_minutes') or scheduler_config.get('max_interval_minutes', 240)) * 60
+        history = self.get_new_item_history(task['source_name'], scheduler_config.get('history_size', 20))
+        
+        return estimate_interval(
+            history,
+            time.time(),
+            default_interval,
+            min_interval,
+            max_interval,
+            scheduler_config.get('cadence_factor', 0.5)
+        )
+    
     def start_scheduler(self):
         """启动定时调度器"""
+        if self.config.get('scheduler', {}).get('adaptive', True):
+            self.start_adaptive_scheduler()
+            return
+        
         interval = self.config.get('interval_minutes', 30)
         
         # 安排定时任务
@@ -461,6 +854,45 @@ class FeedGrepProcessor:
             schedule.run_pending()
             time.sleep(60)  # 每分钟检查一次是否有需要运行的任务
     
+    def start_adaptive_scheduler(self):
+        """启动按RSS源自适应间隔的调度器"""
+        scheduler_config = self.config.get('scheduler', {})
+        default_interval = self.config.get('interval_minutes', 30) * 60
+        self.scheduler = AdaptiveFeedScheduler(
+            default_interval,
+            scheduler_config.get('min_interval_minutes', 5) * 60,
+            scheduler_config.get('max_interval_minutes', 240) * 60,
+            scheduler_config.get('jitter', 0.2),
+            scheduler_config.get('coalesce_seconds', 5)
+        )
+        
+        # 立即执行一次
+        tasks = self.get_feed_tasks()
+        self.process_all_feeds()
+        
+        # 首次调度在各自的间隔内均匀打散，之后按各自的间隔加抖动轮转
+        for task in tasks:
+            self.scheduler.add(task['url'], task, random.uniform(0, self.get_feed_interval(task)))
+        
+        log.info(f"Adaptive scheduler started with {len(tasks)} feeds.")
+        
+        while True:
+            due_tasks = self.scheduler.pop_due()
+            if due_tasks:
+                try:
+                    self.process_feeds(due_tasks)
+                except Exception as e:
+                    log.error(f"Failed to process scheduled feeds: {e}")
+                
+                for task in due_tasks:
+                    # 熔断中的源推迟到退避期结束后再调度
+                    interval = max(self.get_feed_interval(task), self.health.seconds_until_retry(task['url']))
+                    self.scheduler.reschedule(task['url'], interval)
+                    log.debug(f"Feed {task['source_name']} next check in {interval / 60:.1f} minutes.")
+            
+            # 睡到下一个RSS源到期，最长不超过60秒
+            time.sleep(min(60.0, max(1.0, self.scheduler.seconds_until_next())))
+    
     def start_scheduler_async(self):
         """异步启动定时调度器"""
         scheduler_thread = threading.Thread(target=self.start_scheduler, daemon=True)
@@ -473,9 +905,29 @@ def main():
     parser = argparse.ArgumentParser(description='FeedGrep - RSS聚合器')
     parser.add_argument('--host', default='0.0.0.0', help='API服务监听地址')
     parser.add_argument('--port', type=int, default=8000, help='API服务端口')
+    parser.add_argument('--rebuild-fts', action='store_true', help='重建关键词搜索的全文索引后退出')
+    parser.add_argument('--backfill-matches', action='store_true',
+                        help='按当前default_keywords重新计算所有条目的关键词匹配后退出')
+    parser.add_argument('--apply-retention', action='store_true',
+                        help='按retention配置立即归档过期条目并回收空闲页后退出')
     
     args = parser.parse_args()
     
+    # 维护命令：只打开数据库，不启动抓取和API服务
+    if args.rebuild_fts or args.backfill_matches or args.apply_retention:
+        with open('feedgrep.yaml', 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f)
+        chunk_size = config.get('database', {}).get('migration_chunk_size', DEFAULT_CHUNK_SIZE)
+        db = get_database('feedgrep.db', config)
+        migrate(db, config)
+        if args.rebuild_fts:
+            rebuild_fts_index(db, chunk_size)
+        if args.backfill_matches:
+            backfill_keyword_matches(db, KeywordMatcher.from_config(config), chunk_size)
+        if args.apply_retention:
+            ItemArchive(db, config).apply_retention()
+        return
+    
     # 创建FeedGrep处理器实例
     processor = FeedGrepProcessor('feedgrep.yaml')
     
@@ -11,10 +11,13 @@ import yaml
 import feedparser
 import argparse
 from datetime import datetime
-import requests
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import quote
 
+from utils.feed_cache import DEFAULT_CONTENT_TYPES, JsonValidatorStore, conditional_fetch
+from utils.feed_parser import response_headers
+from utils.http_client import configure_http_client, get_http_client
+
 class GitHubIssuesDataStore:
     """使用GitHub Issues作为数据存储的实现"""
     
@@ -24,6 +27,7 @@ class GitHubIssuesDataStore:
         self.repo = repo
         self.check_closed = check_closed  # 是否在去重时检查已关闭的issues
         self.base_url = f"https://api.github.com/repos/{owner}/{repo}"
+        self.http_client = get_http_client()
         self.headers = {
             "Accept": "application/vnd.github.v3+json",
             "Authorization": f"token {token}",
@@ -80,7 +84,7 @@ _自动创建于 {datetime.now().isoformat()}_
                 "labels": labels
             }
             
-            response = requests.post(
+            response = self.http_client.post(
                 f"{self.base_url}/issues",
                 json=data,
                 headers=self.headers,
@@ -111,7 +115,7 @@ _自动创建于 {datetime.now().isoformat()}_
         """
         try:
             url = f"{self.base_url}/issues?labels={quote(label)}&state={state}&per_page=100"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.http_client.get(url, headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 return response.json()
@@ -134,7 +138,7 @@ _自动创建于 {datetime.now().isoformat()}_
                 search_query += " is:open"
             
             url = f"https://api.github.com/search/issues?q={search_query}"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.http_client.get(url, headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 result = response.json()
@@ -153,41 +157,65 @@ _自动创建于 {datetime.now().isoformat()}_
 class FeedGrepGitHubActions:
     """GitHub Actions环境下的FeedGrep处理器"""
     
-    def __init__(self, config_path: str, token: str, owner: str, repo: str, check_closed: bool = True):
+    def __init__(self, config_path: str, token: str, owner: str, repo: str, check_closed: bool = True,
+                 cache_file: Optional[str] = None):
         """初始化处理器"""
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = yaml.safe_load(f)
         
+        # 初始化共享的HTTP客户端，RSS源和GitHub API请求都通过它发出
+        self.http_client = configure_http_client(self.config)
         self.store = GitHubIssuesDataStore(token, owner, repo, check_closed)
+        # RSS源的HTTP校验信息缓存（ETag/Last-Modified/内容哈希），为空时不使用条件请求
+        self.validator_store = JsonValidatorStore(cache_file) if cache_file else None
         self.processed_items = 0
         self.skipped_items = 0
+        self.unchanged_feeds = 0
     
-    def fetch_feed(self, feed_url: str) -> Optional[feedparser.FeedParserDict]:
-        """获取RSS源"""
+    def fetch_feed(self, feed_url: str) -> Tuple[Optional[feedparser.FeedParserDict], Optional[Dict]]:
+        """
+        获取RSS源
+        
+        Returns:
+            (解析结果, 校验信息)，源未更新或获取失败时解析结果为None
+        """
         try:
             print(f"⏳ 获取RSS: {feed_url}")
-            result = feedparser.parse(feed_url)
+            cached = self.validator_store.get(feed_url) if self.validator_store else None
+            fetch_config = self.config.get('fetch', {})
+            response = conditional_fetch(
+                feed_url,
+                cached,
+                fetch_config.get('timeout', 30),
+                session=self.http_client,
+                max_bytes=fetch_config.get('max_bytes', 5 * 1024 * 1024),
+                allowed_content_types=fetch_config.get('allowed_content_types', DEFAULT_CONTENT_TYPES)
+            )
             
-            if result.status == 200 or hasattr(result, 'entries'):
-                return result
-            else:
-                print(f"❌ 获取失败 (Status: {result.status})")
-                return None
+            if response['not_modified']:
+                print(f"⏭️  未更新 (Status: {response['status_code']})")
+                self.unchanged_feeds += 1
+                return None, response['validators']
+            
+            headers = response_headers(response['url'], response['content_type'])
+            return feedparser.parse(response['content'], response_headers=headers), response['validators']
                 
         except Exception as e:
             print(f"❌ 获取RSS时出错: {e}")
-            return None
+            return None, None
     
     def process_feed(self, feed_url: str, category: str, source_name: str):
         """处理单个RSS源"""
         print(f"\n📌 处理 {source_name} ({category})")
         
-        feed = self.fetch_feed(feed_url)
+        feed, validators = self.fetch_feed(feed_url)
         if not feed:
+            self.save_validators(feed_url, validators)
             return
         
         entries = feed.get('entries', [])[:10]  # 只处理最新10条
         
+        failed = False
         for entry in entries:
             # 去重检查
             if self.store.check_item_exists(entry.get('title', 'Untitled')):
@@ -198,6 +226,17 @@ class FeedGrepGitHubActions:
             # 创建Issue记录
             if self.store.create_item_issue(entry, category, source_name):
                 self.processed_items += 1
+            else:
+                failed = True
+        
+        # 所有条目都处理成功后再记录校验信息，有条目创建失败时下次重新获取，不会被误判为未更新
+        if not failed:
+            self.save_validators(feed_url, validators)
+    
+    def save_validators(self, feed_url: str, validators: Optional[Dict]):
+        """记录RSS源的校验信息"""
+        if self.validator_store and validators:
+            self.validator_store.set(feed_url, validators)
     
     def process_all_feeds(self):
         """处理所有RSS源"""
@@ -217,10 +256,14 @@ class FeedGrepGitHubActions:
                 if source_url:
                     self.process_feed(source_url, category, source_name)
         
+        if self.validator_store:
+            self.validator_store.save()
+        
         print("\n" + "=" * 60)
         print(f"✅ 处理完成")
         print(f"   新增: {self.processed_items}")
         print(f"   重复跳过: {self.skipped_items}")
+        print(f"   未更新的源: {self.unchanged_feeds}")
         print("=" * 60)
 
 
@@ -232,6 +275,8 @@ def main():
     parser.add_argument('--repo', required=True, help='仓库名称')
     parser.add_argument('--ignore-closed', action='store_true', 
                        help='去重时忽略已关闭的Issues（用于清空去重记忆后重新处理）')
+    parser.add_argument('--cache-file', default='.feedgrep_cache/validators.json',
+                       help='RSS源HTTP校验信息缓存文件，传空字符串禁用条件请求')
     
     args = parser.parse_args()
     
@@ -246,7 +291,8 @@ def main():
         args.token,
         args.owner,
         args.repo,
-        check_closed=not args.ignore_closed
+        check_closed=not args.ignore_closed,
+        cache_file=args.cache_file or None
     )
     
     processor.process_all_feeds()
@@ -5,13 +5,14 @@ FeedGrep 数据迁移脚本
 """
 
 import sqlite3
-import requests
 import argparse
 import sys
 from datetime import datetime
 from typing import List, Dict
 from urllib.parse import quote
 
+from utils.http_client import get_http_client
+
 
 class GitHubIssuesDataStore:
     """使用GitHub Issues作为数据存储"""
@@ -21,6 +22,7 @@ class GitHubIssuesDataStore:
         self.owner = owner
         self.repo = repo
         self.base_url = f"https://api.github.com/repos/{owner}/{repo}"
+        self.http_client = get_http_client()
         self.headers = {
             "Accept": "application/vnd.github.v3+json",
             "Authorization": f"token {token}",
@@ -67,7 +69,7 @@ _从SQLite数据库迁移于 {datetime.now().isoformat()}_
                 "labels": labels
             }
             
-            response = requests.post(
+            response = self.http_client.post(
                 f"{self.base_url}/issues",
                 json=data,
                 headers=self.headers,
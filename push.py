@@ -1,9 +1,9 @@
-import requests
 import smtplib
 import re
 from email.mime.text import MIMEText
 from email.header import Header
 from utils.Logger import get_logger
+from utils.http_client import get_http_client
 from datetime import datetime, time
 import pytz
 
@@ -20,6 +20,8 @@ class PushManager:
         self.time_restriction_enabled = config.get('push', {}).get('time_restriction_enabled', True)
         self.time_start_str = config.get('push', {}).get('time_start', '08:00')
         self.time_end_str = config.get('push', {}).get('time_end', '22:00')
+        # 共享的HTTP客户端（复用连接并按主机限流）
+        self.http_client = get_http_client(config)
 
     def is_within_time_range(self):
         """
@@ -117,7 +119,7 @@ class PushManager:
                 }
             }
         }
-        response = requests.post(url, json=payload)
+        response = self.http_client.post(url, json=payload)
         return response.status_code == 200
 
     def _format_feishu_content(self, content):
@@ -158,7 +160,7 @@ class PushManager:
                 }
             }
             
-        response = requests.post(url, json=payload)
+        response = self.http_client.post(url, json=payload)
         return response.status_code == 200
 
     def _strip_markdown_format(self, content):
@@ -216,7 +218,7 @@ class PushManager:
             "text": text,
             "parse_mode": "HTML"
         }
-        response = requests.post(url, json=payload)
+        response = self.http_client.post(url, json=payload)
         return response.status_code == 200
 
     def send_bulk_push(self, channels, title, content):
@@ -0,0 +1,422 @@
+import os
+import json
+import time
+import zlib
+import heapq
+import threading
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+from utils.Logger import get_logger
+from utils.content import decode_content, html_to_text
+from utils.db import Database
+from utils.keywords import KeywordMatcher, KeywordRule
+
+log = get_logger(__name__)
+
+# 归档目录的默认位置（相对数据库文件所在目录）
+DEFAULT_ARCHIVE_DIR = 'archive'
+
+# 归档块缓存的默认大小上限（MB，按块解压后的字节数计算）
+DEFAULT_BLOCK_CACHE_MB = 32
+
+# created_at的格式（SQLite的CURRENT_TIMESTAMP，UTC）
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class RetentionPolicy:
+    """一个分类的保留策略，两个条件任一满足的条目都会被归档"""
+
+    def __init__(self, max_age_days: float = 0, max_items: int = 0):
+        """
+        Args:
+            max_age_days: 入库超过多少天的条目被归档，0表示不限制
+            max_items: 分类中最多保留的条目数，更旧的条目被归档，0表示不限制
+        """
+        self.max_age_days = max(0, max_age_days or 0)
+        self.max_items = max(0, max_items or 0)
+
+    def __repr__(self):
+        return f"RetentionPolicy(max_age_days={self.max_age_days}, max_items={self.max_items})"
+
+
+class ItemArchive:
+    """
+    条目保留策略与只读归档
+
+    超出保留策略的条目从feedgrep_items移到按月划分的归档段文件（<archive_dir>/items-YYYY-MM.seg）。
+    段文件只追加不修改，由若干个zlib压缩的块组成，每块是同一分类、同一月份的若干条目（每行一个JSON，
+    包含完整内容）。块在段文件中的位置记录在archive_blocks表中，查询时按表中的位置直接读取对应的块。
+
+    条目ID与入库时间同序，归档条目按ID倒序返回，与在线查询按created_at倒序的顺序一致。
+    已归档条目的指纹保留在archived_item_hashes表中，仍在RSS源中的旧条目不会被重新写入。
+    """
+
+    def __init__(self, db: Database, config: Optional[Dict] = None):
+        """
+        Args:
+            db: 数据库连接管理对象
+            config: 完整的配置字典，读取其中的retention部分
+        """
+        retention_config = (config or {}).get('retention', {}) or {}
+
+        self.db = db
+        self.enabled = retention_config.get('enabled', False)
+        self.default_policy = RetentionPolicy(
+            retention_config.get('max_age_days', 0),
+            retention_config.get('max_items', 0)
+        )
+        # 分类中未设置的字段沿用全局设置
+        self.policies = {
+            category: RetentionPolicy(
+                (policy or {}).get('max_age_days', self.default_policy.max_age_days),
+                (policy or {}).get('max_items', self.default_policy.max_items)
+            )
+            for category, policy in (retention_config.get('categories', {}) or {}).items()
+        }
+        self.interval = retention_config.get('interval_hours', 24) * 3600
+        self.chunk_size = max(1, retention_config.get('chunk_size', 2000))
+        self.incremental_vacuum_enabled = retention_config.get('incremental_vacuum', True)
+        self.vacuum_pages = max(1, retention_config.get('vacuum_pages', 2000))
+        self.block_cache = BlockCache(int(retention_config.get('block_cache_mb', DEFAULT_BLOCK_CACHE_MB) * 1024 * 1024))
+
+        archive_dir = retention_config.get('archive_dir', DEFAULT_ARCHIVE_DIR)
+        if not os.path.isabs(archive_dir):
+            archive_dir = os.path.join(os.path.dirname(os.path.abspath(db.db_path)), archive_dir)
+        self.archive_dir = archive_dir
+
+        self.last_run = None
+        self.lock = threading.Lock()
+
+    def policy_for(self, category: Optional[str]) -> RetentionPolicy:
+        return self.policies.get(category, self.default_policy)
+
+    def run_if_due(self) -> int:
+        """
+        距上次执行超过interval_hours时执行一次保留策略（每批抓取结束后调用）
+
+        Returns:
+            归档的条目数
+        """
+        if not self.enabled:
+            return 0
+        if self.last_run is not None and time.monotonic() - self.last_run < self.interval:
+            return 0
+        return self.apply_retention()
+
+    def apply_retention(self) -> int:
+        """
+        按各分类的保留策略归档过期条目，然后增量回收空闲页
+
+        Returns:
+            归档的条目数
+        """
+        with self.lock:
+            self.last_run = time.monotonic()
+            with self.db.reader() as conn:
+                categories = [row[0] for row in conn.execute('SELECT DISTINCT category FROM feedgrep_items')]
+
+            archived = 0
+            for category in categories:
+                cutoff = self._cutoff(category, self.policy_for(category))
+                if cutoff:
+                    archived += self._archive_before(category, cutoff)
+
+            if archived:
+                log.info(f"Archived {archived} items to {self.archive_dir}.")
+                self.db.bump_data_version()
+            if self.incremental_vacuum_enabled:
+                self.incremental_vacuum()
+            return archived
+
+    def _cutoff(self, category: Optional[str], policy: RetentionPolicy) -> Optional[str]:
+        """计算分类的归档界限，created_at早于该时间的条目需要归档"""
+        cutoffs = []
+        if policy.max_age_days:
+            expire_at = datetime.now(timezone.utc) - timedelta(days=policy.max_age_days)
+            cutoffs.append(expire_at.strftime(_TIMESTAMP_FORMAT))
+        if policy.max_items:
+            with self.db.reader() as conn:
+                row = conn.execute('''
+                    SELECT created_at FROM feedgrep_items WHERE category IS ?
+                    ORDER BY created_at DESC LIMIT 1 OFFSET ?
+                ''', (category, policy.max_items - 1)).fetchone()
+            if row and row[0]:
+                cutoffs.append(row[0])
+        return max(cutoffs) if cutoffs else None
+
+    def _archive_before(self, category: Optional[str], cutoff: str) -> int:
+        """
+        把分类中created_at早于cutoff的条目按块写入归档段文件，再删除在线数据
+
+        先追加并同步段文件，再在一个事务中写入块位置并删除条目。事务失败时段文件中多出的块没有被引用，
+        条目仍在在线表中，下次会重新归档。
+        """
+        archived = 0
+        while True:
+            with self.db.reader() as conn:
+                rows = conn.execute('''
+                    SELECT i.*, c.encoding AS content_encoding, c.content AS content_data
+                    FROM feedgrep_items i LEFT JOIN feedgrep_item_content c ON c.item_id = i.id
+                    WHERE i.category IS ? AND i.created_at < ?
+                    ORDER BY i.created_at, i.id LIMIT ?
+                ''', (category, cutoff, self.chunk_size)).fetchall()
+            if not rows:
+                break
+
+            records = []
+            for row in rows:
+                record = dict(row)
+                encoding = record.pop('content_encoding')
+                data = record.pop('content_data')
+                record['content'] = decode_content(encoding, data) if data is not None else record['description']
+                records.append(record)
+
+            blocks = self._append_blocks(category, records)
+            with self.db.transaction() as conn:
+                conn.executemany('''
+                    INSERT INTO archive_blocks
+                        (segment, category, byte_offset, byte_length, item_count,
+                         min_item_id, max_item_id, min_created_at, max_created_at, archived_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', blocks)
+                conn.executemany(
+                    'INSERT OR IGNORE INTO archived_item_hashes (item_hash) VALUES (?)',
+                    [(record['item_hash'],) for record in records if record['item_hash'] is not None]
+                )
+                # 全文索引、完整内容和关键词匹配由触发器一并删除
+                conn.executemany('DELETE FROM feedgrep_items WHERE id = ?', [(record['id'],) for record in records])
+
+            archived += len(records)
+            if len(rows) < self.chunk_size:
+                break
+
+        if archived:
+            log.info(f"Archived {archived} items of category {category} created before {cutoff}.")
+        return archived
+
+    def _append_blocks(self, category: Optional[str], records: List[Dict]) -> List[tuple]:
+        """按月份把条目压缩成块追加到段文件，返回archive_blocks的行"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        by_month = {}
+        for record in records:
+            by_month.setdefault((record['created_at'] or '')[:7] or 'unknown', []).append(record)
+
+        archived_at = datetime.now().isoformat(timespec='seconds')
+        blocks = []
+        for month, month_records in by_month.items():
+            segment = f'items-{month}.seg'
+            lines = '\n'.join(json.dumps(record, ensure_ascii=False) for record in month_records)
+            data = zlib.compress(lines.encode('utf-8'), 6)
+            with open(os.path.join(self.archive_dir, segment), 'ab') as f:
+                offset = f.tell()
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            blocks.append((
+                segment,
+                category,
+                offset,
+                len(data),
+                len(month_records),
+                min(record['id'] for record in month_records),
+                max(record['id'] for record in month_records),
+                min(record['created_at'] or '' for record in month_records),
+                max(record['created_at'] or '' for record in month_records),
+                archived_at
+            ))
+        return blocks
+
+    def incremental_vacuum(self) -> int:
+        """
+        分步回收空闲页，每步一个短事务，不会长时间阻塞写入
+
+        首次执行时数据库如果还不是增量自动清理模式，需要做一次完整的VACUUM来切换。
+
+        Returns:
+            回收的页数
+        """
+        with self.db.transaction() as conn:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                log.info("Switching database to incremental auto-vacuum, running a one-time full VACUUM...")
+                conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                conn.execute('VACUUM')
+                return 0
+
+        freed = 0
+        while True:
+            with self.db.transaction() as conn:
+                free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                if not free_pages:
+                    break
+                # 每回收一页返回一行，需要取完结果才会执行完
+                conn.execute(f'PRAGMA incremental_vacuum({min(free_pages, self.vacuum_pages)})').fetchall()
+            freed += min(free_pages, self.vacuum_pages)
+
+        if freed:
+            log.info(f"Incremental vacuum freed {freed} pages.")
+        return freed
+
+    def has_blocks(self) -> bool:
+        """是否有已归档的条目"""
+        with self.db.reader() as conn:
+            return conn.execute('SELECT 1 FROM archive_blocks LIMIT 1').fetchone() is not None
+
+    def iter_items(self, category: Optional[str] = None, before_id: Optional[int] = None,
+                   since: Optional[str] = None) -> Iterator[Dict]:
+        """
+        按ID倒序（即入库时间倒序）逐条返回归档条目
+
+        各块按最大ID倒序排列，只有在块中可能存在比已载入条目更新的条目时才读取该块，
+        只翻前几页时不必解压所有的块。
+
+        Args:
+            category: 只返回该分类的条目
+            before_id: 只返回ID小于该值的条目（游标翻页），不包含更新条目的块不会被读取
+            since: 跳过所有条目都早于该时间的块（块内的条目仍需调用方按时间筛选）
+        """
+        conditions, params = ['1 = 1'], []
+        if before_id is not None:
+            conditions.append('min_item_id < ?')
+            params.append(before_id)
+        if since is not None:
+            conditions.append('max_created_at >= ?')
+            params.append(since)
+        condition = ' AND '.join(conditions)
+        with self.db.reader() as conn:
+            if category:
+                blocks = conn.execute(
+                    f'SELECT * FROM archive_blocks WHERE category = ? AND {condition} ORDER BY max_item_id DESC',
+                    [category] + params
+                ).fetchall()
+            else:
+                blocks = conn.execute(
+                    f'SELECT * FROM archive_blocks WHERE {condition} ORDER BY max_item_id DESC', params
+                ).fetchall()
+
+        heap = []
+        position = 0
+        while heap or position < len(blocks):
+            while position < len(blocks) and (not heap or blocks[position]['max_item_id'] > -heap[0][0]):
+                for record in self._read_block(blocks[position]):
+                    if before_id is None or record['id'] < before_id:
+                        heapq.heappush(heap, (-record['id'], record))
+                position += 1
+            yield dict(heapq.heappop(heap)[1])
+
+    def get_items(self, category: Optional[str] = None, source: Optional[str] = None,
+                  keyword: Optional[str] = None, offset: int = 0, limit: int = 50,
+                  before_id: Optional[int] = None, since: Optional[str] = None,
+                  until: Optional[str] = None) -> List[Dict]:
+        """
+        分页查询归档条目，筛选条件与在线查询一致（关键词匹配标题和完整内容的纯文本）
+
+        Args:
+            category: 分类筛选
+            source: 来源筛选
+            keyword: 关键词表达式
+            offset: 在归档条目中的偏移量
+            limit: 返回数量限制
+            before_id: 只返回ID小于该值的条目（游标翻页）
+            since: 只返回入库时间不早于该时间的条目
+            until: 只返回入库时间早于该时间的条目
+
+        Returns:
+            条目列表，不含完整内容，archived字段为True
+        """
+        matcher = KeywordMatcher([KeywordRule(keyword)]) if keyword and keyword.strip() else None
+        items = []
+        for record in self.iter_items(category, before_id, since):
+            if source and record['source_name'] != source:
+                continue
+            if since or until:
+                # 与SQL中的比较一致，没有入库时间的条目不满足任何时间条件
+                created_at = record.get('created_at')
+                if created_at is None or (since and created_at < since) or (until and created_at >= until):
+                    continue
+            if matcher and not matcher.match(record['title'], html_to_text(record['content'])):
+                continue
+            if offset:
+                offset -= 1
+                continue
+            record.pop('content', None)
+            record['archived'] = True
+            items.append(record)
+            if len(items) >= limit:
+                break
+        return items
+
+    def get_item(self, item_id: int) -> Optional[Dict]:
+        """
+        按ID查找归档条目
+
+        Returns:
+            条目字典（包含完整内容），不存在时返回None
+        """
+        with self.db.reader() as conn:
+            blocks = conn.execute(
+                'SELECT * FROM archive_blocks WHERE min_item_id <= ? AND max_item_id >= ?', (item_id, item_id)
+            ).fetchall()
+        for block in blocks:
+            for record in self._read_block(block):
+                if record['id'] == item_id:
+                    record = dict(record)
+                    record['archived'] = True
+                    return record
+        return None
+
+    def _read_block(self, block) -> tuple:
+        key = (block['segment'], block['byte_offset'], block['byte_length'])
+        records = self.block_cache.get(key)
+        if records is None:
+            records, size = _load_block(os.path.join(self.archive_dir, key[0]), key[1], key[2])
+            self.block_cache.put(key, records, size)
+        return records
+
+
+class BlockCache:
+    """
+    最近读取的归档块（解压后的条目，包含完整内容）的LRU缓存，按解压后的字节数限制总大小
+
+    段文件只追加，同一位置的块内容不会变化，缓存不需要失效。超过总大小的块不缓存。
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(0, max_bytes)
+        self.blocks = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        with self.lock:
+            entry = self.blocks.get(key)
+            if entry is None:
+                return None
+            self.blocks.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: tuple, records: tuple, size: int):
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.blocks:
+                return
+            self.blocks[key] = (records, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self.blocks.popitem(last=False)
+                self.size -= evicted_size
+
+
+def _load_block(path: str, offset: int, length: int) -> tuple:
+    """
+    读取并解压一个块
+
+    Returns:
+        (条目元组, 解压后的字节数)
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = zlib.decompress(f.read(length))
+    return tuple(json.loads(line) for line in data.decode('utf-8').split('\n') if line), len(data)
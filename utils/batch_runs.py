@@ -0,0 +1,132 @@
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List
+
+from utils.db import Database
+
+# 分阶段计时的阶段名称，对应batch_runs表中的<阶段>_seconds列
+STAGES = ('fetch', 'parse', 'dedup', 'insert', 'push')
+
+# 计数列
+COUNTERS = (
+    'feeds_attempted',
+    'feeds_skipped',
+    'feeds_succeeded',
+    'feeds_not_modified',
+    'feeds_failed',
+    'items_fetched',
+    'items_inserted'
+)
+
+
+class BatchRunStats:
+    """
+    一个批次的计数和分阶段耗时
+
+    抓取和解析在线程池中并发进行，各阶段耗时是所有RSS源的累计值，可能大于批次的总耗时。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+
+    def count(self, name: str, value: int = 1):
+        with self.lock:
+            self.counters[name] += value
+
+    def add_time(self, stage: str, seconds: float):
+        with self.lock:
+            self.seconds[stage] += seconds
+
+    @contextmanager
+    def timer(self, stage: str):
+        """统计代码块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def timed_iter(self, iterable: Iterable, stage: str) -> Iterator:
+        """
+        逐条统计取出每个元素的耗时
+
+        用于按需解析的条目迭代器，解析实际发生在调用方取条目时。
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                value = next(iterator)
+            except StopIteration:
+                self.add_time(stage, time.perf_counter() - start)
+                return
+            self.add_time(stage, time.perf_counter() - start)
+            yield value
+
+
+class BatchRunRecorder:
+    """
+    批次记录（batch_runs表）
+
+    批处理ID由batch_runs的自增主键分配，空批次也会留下记录，ID不会被重复使用。
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def peek_next_id(self) -> int:
+        """下一个批次将会分配到的ID（不创建记录）"""
+        with self.db.reader() as conn:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'batch_runs'").fetchone()
+        return (row[0] if row else 0) + 1
+
+    def start(self) -> int:
+        """
+        创建批次记录
+
+        Returns:
+            新批次的ID
+        """
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                'INSERT INTO batch_runs (started_at) VALUES (?)',
+                (datetime.now().isoformat(timespec='seconds'),)
+            )
+            return cursor.lastrowid
+
+    def finish(self, batch_id: int, stats: BatchRunStats, duration: float):
+        """
+        写入批次的结束时间、计数和分阶段耗时
+
+        Args:
+            batch_id: 批次ID
+            stats: 批次统计
+            duration: 批次总耗时（秒）
+        """
+        with stats.lock:
+            values = dict(stats.counters)
+            values.update({f'{stage}_seconds': round(seconds, 3) for stage, seconds in stats.seconds.items()})
+        values['duration_seconds'] = round(duration, 3)
+        values['finished_at'] = datetime.now().isoformat(timespec='seconds')
+
+        columns = ', '.join(f"{column} = ?" for column in values)
+        with self.db.transaction() as conn:
+            conn.execute(f'UPDATE batch_runs SET {columns} WHERE id = ?', (*values.values(), batch_id))
+
+    def get_recent(self, limit: int = 50) -> List[Dict]:
+        """
+        获取最近的批次记录
+
+        Args:
+            limit: 最多返回的记录数
+
+        Returns:
+            批次记录列表，最新的在前
+        """
+        with self.db.reader() as conn:
+            rows = conn.execute('SELECT * FROM batch_runs ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+        return [dict(row) for row in rows]
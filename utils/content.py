@@ -0,0 +1,78 @@
+import re
+import html
+import zlib
+from typing import Dict, Optional, Tuple
+
+# 列表中保存的纯文本摘要的默认最大长度（字符数）
+DEFAULT_SNIPPET_LENGTH = 500
+
+# 超过该字节数的完整内容才压缩，太短的内容压缩后反而更大
+DEFAULT_COMPRESS_MIN_BYTES = 256
+
+# 完整内容的存储编码
+ENCODING_PLAIN = 'plain'
+ENCODING_ZLIB = 'zlib'
+
+_SKIPPED_BLOCKS = re.compile(r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_BLOCK_TAGS = re.compile(r'<\s*(br|/p|/div|/li|/h[1-6]|/tr)\b[^>]*>', re.IGNORECASE)
+_TAGS = re.compile(r'<[^>]*>')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class ContentSettings:
+    """完整内容和摘要的存储设置（配置中的storage部分）"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        storage_config = (config or {}).get('storage', {}) or {}
+        self.snippet_length = max(0, storage_config.get('snippet_length', DEFAULT_SNIPPET_LENGTH))
+        self.compress = storage_config.get('compress_content', True)
+        self.compress_min_bytes = storage_config.get('compress_min_bytes', DEFAULT_COMPRESS_MIN_BYTES)
+
+
+def html_to_text(content: str) -> str:
+    """
+    把HTML摘要转换为纯文本：去掉脚本和样式、标签，解码实体并合并空白
+
+    Args:
+        content: HTML内容
+
+    Returns:
+        纯文本
+    """
+    if not content:
+        return ''
+    text = _SKIPPED_BLOCKS.sub(' ', content)
+    text = _BLOCK_TAGS.sub(' ', text)
+    text = _TAGS.sub('', text)
+    return _WHITESPACE.sub(' ', html.unescape(text)).strip()
+
+
+def make_snippet(text: str, length: int = DEFAULT_SNIPPET_LENGTH) -> str:
+    """把纯文本截断为摘要，超出长度时以省略号结尾"""
+    if len(text) <= length:
+        return text
+    return text[:max(0, length - 1)].rstrip() + '…'
+
+
+def encode_content(content: str, settings: ContentSettings) -> Tuple[str, bytes]:
+    """
+    编码完整内容以便存入feedgrep_item_content表
+
+    Returns:
+        (编码方式, 内容字节)
+    """
+    data = (content or '').encode('utf-8')
+    if settings.compress and len(data) >= settings.compress_min_bytes:
+        compressed = zlib.compress(data, 6)
+        if len(compressed) < len(data):
+            return ENCODING_ZLIB, compressed
+    return ENCODING_PLAIN, data
+
+
+def decode_content(encoding: Optional[str], data: Optional[bytes]) -> str:
+    """还原encode_content编码的完整内容"""
+    if data is None:
+        return ''
+    if encoding == ENCODING_ZLIB:
+        data = zlib.decompress(data)
+    return bytes(data).decode('utf-8')
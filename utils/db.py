@@ -0,0 +1,259 @@
+import os
+import queue
+import hashlib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from utils.Logger import get_logger
+
+log = get_logger(__name__)
+
+# 默认的连接参数
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',      # 读写互不阻塞
+    'synchronous': 'NORMAL',    # WAL模式下NORMAL已能保证不损坏数据库，只在断电时可能丢失最后几个事务
+    'cache_size': -20000,       # 负数表示KB，约20MB页缓存
+    'mmap_size': 268435456,     # 256MB内存映射读
+    'busy_timeout': 5000,       # 毫秒
+    'temp_store': 'MEMORY'
+}
+
+
+# 设置了超时的查询每执行这么多条虚拟机指令检查一次是否超时
+PROGRESS_HANDLER_INTERVAL = 1000
+
+
+class QueryTimeoutError(Exception):
+    """查询超过了允许的执行时间，已被中断"""
+
+
+def item_fingerprint(source_name: str, title: str, link: str) -> int:
+    """
+    计算RSS条目的指纹，同一来源中标题和链接都相同的条目视为同一条
+
+    Args:
+        source_name: RSS源名称
+        title: 条目标题
+        link: 条目链接
+
+    Returns:
+        有符号64位整数（SQLite INTEGER的范围），可以直接存为整数主键大小的索引列
+    """
+    key = '\x1f'.join((source_name or '', title or '', link or ''))
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+class Database:
+    """
+    共享的SQLite连接管理
+
+    每个数据库文件在进程内只保留一个长连接用于写入（写操作串行执行），
+    另外维护一个只读连接池供查询使用。数据库使用WAL日志模式，查询不会阻塞写入，
+    写入也不会阻塞查询。
+    """
+
+    def __init__(self, db_path: str, config: Optional[Dict] = None):
+        """
+        Args:
+            db_path: SQLite数据库路径
+            config: 完整的配置字典，读取其中的database部分
+        """
+        db_config = (config or {}).get('database', {}) or {}
+
+        self.db_path = db_path
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        self.pragmas.update(db_config.get('pragmas', {}) or {})
+        self.read_pool_size = max(1, db_config.get('read_pool_size', 4))
+
+        self.write_lock = threading.RLock()
+        self.writer_conn = self._connect()
+        # 只读连接按需创建，最多read_pool_size个
+        self.readers = queue.LifoQueue(maxsize=self.read_pool_size)
+        self.reader_count = 0
+        self.reader_lock = threading.Lock()
+
+        # 进程内缓存的数据版本（data_version表），见get_data_version
+        self.data_version = None
+        self.data_version_checked = 0.0
+        # 数据版本递增后的回调（同一进程中的实时推送），见add_data_listener
+        self.data_listeners = []
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.pragmas['busy_timeout'] / 1000,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+
+        for name, value in self.pragmas.items():
+            # journal_mode保存在数据库文件中，只需在写连接上设置一次
+            if name == 'journal_mode' and read_only:
+                continue
+            conn.execute(f'PRAGMA {name} = {value}')
+
+        if read_only:
+            conn.execute('PRAGMA query_only = ON')
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        在写连接上执行一个事务，正常结束时提交，出现异常时回滚
+
+        Yields:
+            写连接
+        """
+        with self.write_lock:
+            try:
+                yield self.writer_conn
+                self.writer_conn.commit()
+            except Exception:
+                self.writer_conn.rollback()
+                raise
+
+    @contextmanager
+    def reader(self, timeout: Optional[float] = None) -> Iterator[sqlite3.Connection]:
+        """
+        从只读连接池中借用一个连接，用完后归还
+
+        Args:
+            timeout: 在该连接上执行查询的总时间上限（秒），超时后正在执行的查询被中断
+
+        Yields:
+            只读连接
+
+        Raises:
+            QueryTimeoutError: 查询超时被中断
+        """
+        conn = self._acquire_reader()
+        deadline = None
+        if timeout:
+            deadline = time.monotonic() + timeout
+            conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_HANDLER_INTERVAL)
+        try:
+            yield conn
+        except sqlite3.OperationalError as e:
+            if deadline is not None and time.monotonic() > deadline:
+                raise QueryTimeoutError(f"Query exceeded the {timeout}s time limit") from e
+            raise
+        finally:
+            if deadline is not None:
+                conn.set_progress_handler(None, 0)
+            # 归还前结束可能残留的读事务，避免一直持有旧快照
+            if conn.in_transaction:
+                conn.rollback()
+            self.readers.put(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self.readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.reader_lock:
+            if self.reader_count < self.read_pool_size:
+                self.reader_count += 1
+                return self._connect(read_only=True)
+
+        return self.readers.get()
+
+    def bump_data_version(self) -> int:
+        """
+        条目数据有变化（批次写入了新条目、归档了过期条目）后递增数据版本，API的响应缓存据此失效
+
+        Returns:
+            新的数据版本
+        """
+        with self.transaction() as conn:
+            conn.execute('UPDATE data_version SET version = version + 1')
+            version = conn.execute('SELECT version FROM data_version').fetchone()[0]
+        self.data_version = version
+        self.data_version_checked = time.monotonic()
+        for listener in list(self.data_listeners):
+            try:
+                listener(version)
+            except Exception as e:
+                log.error(f"Error notifying data version listener: {e}")
+        return version
+
+    def add_data_listener(self, listener: Callable[[int], None]):
+        """
+        注册数据版本递增后的回调，在递增版本的线程中调用，参数为新的数据版本
+
+        只能收到同一进程中的递增，其他进程的写入需要通过get_data_version轮询发现。
+        """
+        self.data_listeners.append(listener)
+
+    def cached_data_version(self, max_age: float) -> Optional[int]:
+        """
+        返回进程内的数据版本，不访问数据库（可以在事件循环中调用）
+
+        Returns:
+            距上次读取不超过max_age秒时返回该值，否则返回None（需要调用get_data_version重新读取）
+        """
+        if self.data_version is not None and time.monotonic() - self.data_version_checked < max_age:
+            return self.data_version
+        return None
+
+    def get_data_version(self, max_age: float = 0) -> int:
+        """
+        读取数据版本
+
+        距上次读取不超过max_age秒时直接返回进程内的值，不查询数据库。同一进程中递增的版本立即可见，
+        其他进程（API服务单独运行时的抓取进程）递增的版本最多延迟max_age秒。
+
+        Args:
+            max_age: 进程内的值的最长有效时间（秒）
+
+        Returns:
+            数据版本
+        """
+        now = time.monotonic()
+        version = self.cached_data_version(max_age)
+        if version is not None:
+            return version
+        with self.reader() as conn:
+            version = conn.execute('SELECT version FROM data_version').fetchone()[0]
+        self.data_version = version
+        self.data_version_checked = now
+        return version
+
+    def close(self):
+        """关闭所有连接"""
+        with self.write_lock:
+            self.writer_conn.close()
+        while True:
+            try:
+                self.readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(db_path: str, config: Optional[Dict] = None) -> Database:
+    """
+    获取数据库文件对应的共享连接管理对象，同一进程内同一个文件只创建一次
+
+    Args:
+        db_path: SQLite数据库路径
+        config: 完整的配置字典，只在首次创建时使用
+
+    Returns:
+        连接管理对象
+    """
+    key = os.path.abspath(db_path)
+    with _databases_lock:
+        database = _databases.get(key)
+        if database is None:
+            database = Database(db_path, config)
+            _databases[key] = database
+            log.debug(f"Opened database {db_path} with pragmas {database.pragmas}")
+        return database
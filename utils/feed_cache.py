@@ -0,0 +1,246 @@
+import os
+import json
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from utils.Logger import get_logger
+from utils.db import get_database
+
+log = get_logger(__name__)
+
+# 流式下载时每次读取的字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# 默认允许的RSS源Content-Type关键字
+DEFAULT_CONTENT_TYPES = ['xml', 'rss', 'atom', 'text/']
+
+
+class FeedValidatorStore(ABC):
+    """
+    RSS源HTTP校验信息（ETag、Last-Modified、内容哈希、最近状态码）的存储基类
+
+    每条记录是一个字典：
+        etag: 服务端返回的ETag
+        last_modified: 服务端返回的Last-Modified
+        body_hash: 最近一次响应内容的SHA-256
+        last_status: 最近一次请求的HTTP状态码
+        checked_at: 最近一次检查时间（ISO格式）
+    """
+
+    @abstractmethod
+    def get(self, url: str) -> Optional[Dict]:
+        """获取指定RSS源的校验信息，不存在时返回None"""
+
+    @abstractmethod
+    def set(self, url: str, validators: Dict):
+        """保存指定RSS源的校验信息"""
+
+    def save(self):
+        """将校验信息持久化（默认实现为空操作）"""
+        pass
+
+
+class SQLiteValidatorStore(FeedValidatorStore):
+    """将校验信息保存在SQLite数据库的feed_http_cache表中（由utils.migrations创建）"""
+
+    def __init__(self, db_path: str, config: Optional[Dict] = None):
+        self.db_path = db_path
+        self.db = get_database(db_path, config)
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self.db.reader() as conn:
+            row = conn.execute(
+                'SELECT etag, last_modified, body_hash, last_status, checked_at FROM feed_http_cache WHERE url = ?',
+                (url,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def set(self, url: str, validators: Dict):
+        with self.db.transaction() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO feed_http_cache (url, etag, last_modified, body_hash, last_status, checked_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (
+                url,
+                validators.get('etag'),
+                validators.get('last_modified'),
+                validators.get('body_hash'),
+                validators.get('last_status'),
+                validators.get('checked_at')
+            ))
+
+
+class JsonValidatorStore(FeedValidatorStore):
+    """
+    将校验信息保存在JSON文件中
+
+    用于GitHub Actions等没有常驻数据库的环境，文件可以通过actions/cache在多次运行之间保留。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except Exception as e:
+                log.warning(f"读取校验信息缓存 {path} 失败，将重新建立: {e}")
+                self.data = {}
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self.lock:
+            record = self.data.get(url)
+            return dict(record) if record else None
+
+    def set(self, url: str, validators: Dict):
+        with self.lock:
+            self.data[url] = dict(validators)
+
+    def save(self):
+        """先写入临时文件再替换，避免中途失败导致缓存文件损坏"""
+        with self.lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+class FeedDownloadError(Exception):
+    """RSS源响应不符合下载限制（内容过大或类型不对），已提前中止下载"""
+    pass
+
+
+def conditional_fetch(url: str, cached: Optional[Dict], timeout: float,
+                      headers: Optional[Dict] = None, session=None,
+                      max_bytes: Optional[int] = None, allowed_content_types: Optional[List[str]] = None) -> Dict:
+    """
+    带条件请求的RSS源下载
+
+    请求时携带If-None-Match/If-Modified-Since，服务端返回304，或者返回的内容哈希与上次相同，
+    都视为未更新，调用方可以直接跳过解析和去重。
+
+    响应以流的方式分块读取：Content-Length或解压后的实际大小超过max_bytes、
+    或Content-Type不在允许范围内时立即中止，不会把整个响应读入内存。
+
+    Args:
+        url: RSS源地址
+        cached: 上一次保存的校验信息，没有时为None
+        timeout: 请求超时时间（秒）
+        headers: 额外的请求头
+        session: 发起请求使用的会话对象，为空时使用requests模块
+        max_bytes: 解压后内容的最大字节数，为空时不限制
+        allowed_content_types: 允许的Content-Type关键字（如xml、rss），为空时不检查
+
+    Returns:
+        字典，包含：
+            not_modified: 内容是否未更新
+            status_code: HTTP状态码
+            url: 响应的最终地址（跟随重定向后），解析相对链接时使用
+            content_type: 响应的Content-Type，确定字符集时使用
+            content: 响应内容（未更新时为None）
+            validators: 本次请求后应保存的校验信息
+            bytes_transferred: 实际传输的字节数（压缩后）
+            bytes_decompressed: 解压后的字节数
+
+    Raises:
+        FeedDownloadError: 响应超过大小限制或类型不对
+    """
+    request_headers = dict(headers or {})
+    if cached:
+        if cached.get('etag'):
+            request_headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            request_headers['If-Modified-Since'] = cached['last_modified']
+
+    response = (session or requests).get(url, headers=request_headers, timeout=timeout, stream=True)
+    checked_at = datetime.now().isoformat(timespec='seconds')
+
+    with response:
+        if response.status_code == 304 and cached:
+            validators = dict(cached)
+            validators['last_status'] = 304
+            validators['checked_at'] = checked_at
+            return {
+                'not_modified': True,
+                'status_code': 304,
+                'url': response.url,
+                'content_type': response.headers.get('Content-Type'),
+                'content': None,
+                'validators': validators,
+                'bytes_transferred': 0,
+                'bytes_decompressed': 0
+            }
+
+        response.raise_for_status()
+        _check_response_headers(response, max_bytes, allowed_content_types)
+        content, bytes_transferred = _read_limited(response, max_bytes)
+
+    body_hash = hashlib.sha256(content).hexdigest()
+
+    validators = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'body_hash': body_hash,
+        'last_status': response.status_code,
+        'checked_at': checked_at
+    }
+
+    not_modified = bool(cached) and cached.get('body_hash') == body_hash
+    return {
+        'not_modified': not_modified,
+        'status_code': response.status_code,
+        'url': response.url,
+        'content_type': response.headers.get('Content-Type'),
+        'content': None if not_modified else content,
+        'validators': validators,
+        'bytes_transferred': bytes_transferred,
+        'bytes_decompressed': len(content)
+    }
+
+
+def _check_response_headers(response, max_bytes: Optional[int], allowed_content_types: Optional[List[str]]):
+    """根据响应头提前判断是否需要中止下载"""
+    content_type = response.headers.get('Content-Type', '').lower()
+    if allowed_content_types and content_type:
+        if not any(allowed in content_type for allowed in allowed_content_types):
+            raise FeedDownloadError(f"unexpected content type: {content_type}")
+
+    content_length = response.headers.get('Content-Length')
+    if max_bytes and content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise FeedDownloadError(f"response too large: {content_length} bytes (limit {max_bytes})")
+
+
+def _read_limited(response, max_bytes: Optional[int]) -> Tuple[bytes, int]:
+    """
+    分块读取响应内容（自动解压gzip/deflate/br）
+
+    Returns:
+        (解压后的内容, 实际传输的字节数)
+    """
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+        size += len(chunk)
+        if max_bytes and size > max_bytes:
+            raise FeedDownloadError(f"response exceeded {max_bytes} bytes after decompression")
+        chunks.append(chunk)
+
+    # urllib3的tell()返回从连接上读取的原始（压缩后）字节数
+    raw = getattr(response, 'raw', None)
+    try:
+        bytes_transferred = raw.tell() if raw is not None else size
+    except Exception:
+        bytes_transferred = size
+
+    return b''.join(chunks), bytes_transferred
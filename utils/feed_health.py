@@ -0,0 +1,182 @@
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.Logger import get_logger
+from utils.db import get_database
+
+log = get_logger(__name__)
+
+# 熔断器状态
+STATE_CLOSED = 'closed'        # 正常抓取
+STATE_OPEN = 'open'            # 熔断中，退避期内跳过抓取
+STATE_HALF_OPEN = 'half_open'  # 退避期结束，允许一次试探抓取
+
+# get_all支持的排序方式
+SORT_ORDERS = {
+    'failures': "state = 'closed', consecutive_failures DESC, source_name",
+    'bytes': 'total_bytes_transferred DESC, source_name',
+    'latency': 'avg_latency_ms DESC, source_name'
+}
+
+
+class FeedHealthTracker:
+    """
+    RSS源健康状态记录与熔断器
+
+    每个RSS源记录连续失败次数、最近错误、最近成功时间、平均耗时和下载流量。连续失败达到阈值后熔断，
+    在指数增长的退避期内跳过该源；退避期结束后进入半开状态试探一次，成功则恢复，失败则继续加倍退避。
+    记录保存在feed_health表中（由utils.migrations创建）。
+    """
+
+    def __init__(self, db_path: str, config: Optional[Dict] = None):
+        """
+        Args:
+            db_path: SQLite数据库路径
+            config: 完整的配置字典，读取其中的health部分
+        """
+        health_config = (config or {}).get('health', {}) or {}
+
+        self.db_path = db_path
+        self.db = get_database(db_path, config)
+        self.failure_threshold = max(1, health_config.get('failure_threshold', 2))
+        self.base_backoff = health_config.get('base_backoff_minutes', 5) * 60
+        self.max_backoff = health_config.get('max_backoff_minutes', 720) * 60
+        self.latency_weight = health_config.get('latency_weight', 0.2)
+
+    def get(self, url: str) -> Optional[Dict]:
+        """获取单个RSS源的健康记录，没有记录时返回None"""
+        with self.db.reader() as conn:
+            row = conn.execute('SELECT * FROM feed_health WHERE url = ?', (url,)).fetchone()
+        return dict(row) if row else None
+
+    def get_all(self, sort: str = 'failures') -> List[Dict]:
+        """
+        获取所有RSS源的健康记录
+
+        Args:
+            sort: 排序方式，failures（熔断中的源在前）、bytes（累计流量从大到小）或latency（平均耗时从大到小）
+
+        Returns:
+            健康记录列表
+        """
+        order_by = SORT_ORDERS.get(sort, SORT_ORDERS['failures'])
+        with self.db.reader() as conn:
+            rows = conn.execute(f'SELECT * FROM feed_health ORDER BY {order_by}').fetchall()
+
+        records = []
+        for row in rows:
+            record = dict(row)
+            open_until = record.pop('open_until') or 0
+            record['retry_at'] = (
+                datetime.fromtimestamp(open_until).isoformat(timespec='seconds')
+                if record['state'] != STATE_CLOSED and open_until else None
+            )
+            records.append(record)
+        return records
+
+    def allow_request(self, url: str) -> bool:
+        """
+        判断当前是否可以抓取该RSS源
+
+        熔断中的源在退避期内返回False；退避期已过时转为半开状态并返回True，允许一次试探。
+        """
+        record = self.get(url)
+        if not record or record['state'] == STATE_CLOSED:
+            return True
+
+        if time.time() < (record['open_until'] or 0):
+            return False
+
+        if record['state'] == STATE_OPEN:
+            self._update(url, state=STATE_HALF_OPEN)
+        return True
+
+    def seconds_until_retry(self, url: str) -> float:
+        """距离熔断中的源下一次允许试探的秒数，未熔断时返回0"""
+        record = self.get(url)
+        if not record or record['state'] == STATE_CLOSED:
+            return 0.0
+        return max(0.0, (record['open_until'] or 0) - time.time())
+
+    def record_success(self, url: str, source_name: str, latency: float,
+                       bytes_transferred: int = 0, bytes_decompressed: int = 0):
+        """
+        记录一次成功的抓取
+
+        Args:
+            url: RSS源地址
+            source_name: RSS源名称
+            latency: 抓取耗时（秒）
+            bytes_transferred: 实际传输的字节数（压缩后）
+            bytes_decompressed: 解压后的字节数
+        """
+        record = self.get(url)
+        if record and record['state'] != STATE_CLOSED:
+            log.info(f"Feed {source_name} recovered after {record['consecutive_failures']} failures.")
+
+        self._upsert(url, source_name, record, {
+            'state': STATE_CLOSED,
+            'consecutive_failures': 0,
+            'total_successes': (record['total_successes'] if record else 0) + 1,
+            'last_success_at': datetime.now().isoformat(timespec='seconds'),
+            'avg_latency_ms': self._average_latency(record, latency),
+            'open_until': 0,
+            'last_bytes_transferred': bytes_transferred,
+            'last_bytes_decompressed': bytes_decompressed,
+            'total_bytes_transferred': ((record['total_bytes_transferred'] or 0) if record else 0) + bytes_transferred,
+            'total_bytes_decompressed': ((record['total_bytes_decompressed'] or 0) if record else 0) + bytes_decompressed
+        })
+
+    def record_failure(self, url: str, source_name: str, error: str, latency: float):
+        """
+        记录一次失败的抓取，连续失败达到阈值后按指数退避熔断
+
+        Args:
+            url: RSS源地址
+            source_name: RSS源名称
+            error: 错误信息
+            latency: 抓取耗时（秒）
+        """
+        record = self.get(url)
+        failures = (record['consecutive_failures'] if record else 0) + 1
+        values = {
+            'consecutive_failures': failures,
+            'total_failures': (record['total_failures'] if record else 0) + 1,
+            'last_error': error,
+            'last_failure_at': datetime.now().isoformat(timespec='seconds'),
+            'avg_latency_ms': self._average_latency(record, latency),
+            'state': record['state'] if record else STATE_CLOSED,
+            'open_until': record['open_until'] if record else 0
+        }
+
+        if failures >= self.failure_threshold:
+            backoff = min(self.base_backoff * (2 ** (failures - self.failure_threshold)), self.max_backoff)
+            values['state'] = STATE_OPEN
+            values['open_until'] = time.time() + backoff
+            log.warning(
+                f"Feed {source_name} failed {failures} times in a row, backing off for {backoff / 60:.0f} minutes."
+            )
+
+        self._upsert(url, source_name, record, values)
+
+    def _average_latency(self, record: Optional[Dict], latency: float) -> float:
+        """按指数加权移动平均更新平均耗时（毫秒）"""
+        latency_ms = latency * 1000
+        if not record or record['avg_latency_ms'] is None:
+            return round(latency_ms, 1)
+        average = record['avg_latency_ms'] * (1 - self.latency_weight) + latency_ms * self.latency_weight
+        return round(average, 1)
+
+    def _upsert(self, url: str, source_name: str, record: Optional[Dict], values: Dict):
+        if record is None:
+            with self.db.transaction() as conn:
+                conn.execute('INSERT OR IGNORE INTO feed_health (url, source_name) VALUES (?, ?)', (url, source_name))
+        values = dict(values)
+        values['source_name'] = source_name
+        self._update(url, **values)
+
+    def _update(self, url: str, **values):
+        columns = ', '.join(f"{column} = ?" for column in values)
+        with self.db.transaction() as conn:
+            conn.execute(f'UPDATE feed_health SET {columns} WHERE url = ?', (*values.values(), url))
@@ -0,0 +1,262 @@
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import feedparser
+from feedparser.sanitizer import _sanitize_html
+from feedparser.urls import resolve_relative_uris
+
+from utils.Logger import get_logger
+
+log = get_logger(__name__)
+
+# 解析结果中每条条目的字段顺序
+ITEM_FIELDS = ('title', 'link', 'description', 'pub_date', 'guid')
+
+# 可选的解析引擎
+ENGINE_FEEDPARSER = 'feedparser'
+ENGINE_FAST = 'fast'
+
+# 流式解析时每次喂给解析器的字节数
+CHUNK_SIZE = 64 * 1024
+
+# xml:base属性在ElementTree中的名称
+XML_BASE = '{http://www.w3.org/XML/1998/namespace}base'
+
+
+class FastParseError(Exception):
+    """快速解析器无法处理的内容（格式错误或不是RSS 2.0/Atom），需要退回feedparser"""
+    pass
+
+
+def response_headers(url: Optional[str] = None, content_type: Optional[str] = None) -> Dict[str, str]:
+    """
+    构造传给feedparser.parse的响应头
+
+    直接解析下载好的内容时，feedparser拿不到请求地址和HTTP响应头：相对链接无法按地址解析，
+    只在Content-Type中声明的字符集（如GBK）也会被忽略。把这两项作为响应头传入，与parse(url)的行为一致。
+
+    Args:
+        url: 响应的最终地址（跟随重定向后）
+        content_type: 响应的Content-Type
+
+    Returns:
+        响应头字典，没有的项不包含
+    """
+    headers = {}
+    if url:
+        headers['content-location'] = url
+    if content_type:
+        headers['content-type'] = content_type
+    return headers
+
+
+def parse_feed(content: bytes, engine: str = ENGINE_FEEDPARSER, url: Optional[str] = None,
+               content_type: Optional[str] = None) -> List[Tuple[str, str, str, str, str]]:
+    """
+    解析RSS源内容，只保留需要的字段
+
+    返回紧凑的元组而不是feedparser的结果对象，便于在进程池中解析后传回主进程。
+
+    Args:
+        content: RSS源响应内容
+        engine: 解析引擎，feedparser或fast
+        url: 响应的最终地址，用于解析相对链接
+        content_type: 响应的Content-Type，用于确定字符集
+
+    Returns:
+        条目元组列表，字段顺序见ITEM_FIELDS
+    """
+    return list(iter_feed(content, engine, url, content_type))
+
+
+def iter_feed(content: bytes, engine: str = ENGINE_FEEDPARSER, url: Optional[str] = None,
+              content_type: Optional[str] = None) -> Iterator[Tuple[str, str, str, str, str]]:
+    """
+    按源中的顺序逐条解析RSS源内容
+
+    fast引擎边解析边返回条目，调用方提前停止时不再解析剩余内容；遇到格式错误时
+    改用feedparser重新解析，并跳过已经返回过的条目。
+
+    Args:
+        content: RSS源响应内容
+        engine: 解析引擎，feedparser或fast
+        url: 响应的最终地址，用于解析相对链接
+        content_type: 响应的Content-Type，用于确定字符集
+
+    Yields:
+        条目元组，字段顺序见ITEM_FIELDS
+    """
+    if engine != ENGINE_FAST:
+        yield from _iter_feedparser(content, url, content_type)
+        return
+
+    yielded = 0
+    try:
+        for row in iter_fast(content, url):
+            yield row
+            yielded += 1
+    except FastParseError as e:
+        log.debug(f"Fast parser fell back to feedparser: {e}")
+        for index, row in enumerate(_iter_feedparser(content, url, content_type)):
+            if index >= yielded:
+                yield row
+
+
+def iter_items(rows: Iterable[Tuple]) -> Iterator[Dict]:
+    """
+    按源中的顺序把条目元组逐条转换为字典，调用方可以在遇到已存在的条目后提前停止
+
+    Args:
+        rows: parse_feed或iter_feed返回的条目元组
+
+    Yields:
+        RSS条目字典
+    """
+    for row in rows:
+        yield dict(zip(ITEM_FIELDS, row))
+
+
+def _iter_feedparser(content: bytes, url: Optional[str] = None,
+                     content_type: Optional[str] = None) -> Iterator[Tuple[str, str, str, str, str]]:
+    feed = feedparser.parse(content, response_headers=response_headers(url, content_type))
+
+    for entry in feed.entries:
+        link = entry.get('link', '')
+        yield (
+            entry.get('title', ''),
+            link,
+            entry.get('summary', ''),
+            entry.get('published', ''),
+            entry.get('id', link)
+        )
+
+
+def iter_fast(content: bytes, url: Optional[str] = None) -> Iterator[Tuple[str, str, str, str, str]]:
+    """
+    RSS 2.0/RSS 1.0/Atom的流式快速解析
+
+    使用增量XML解析器分块读取内容，只提取标题、链接、摘要、发布时间和ID五个字段，
+    每解析完一个条目立即返回并释放对应的元素。字段含义与feedparser保持一致：
+    摘要优先取description/summary，没有时取content；发布时间取pubDate/published/issued；
+    ID取guid/id，没有时使用链接。链接按xml:base和响应地址解析为绝对地址，摘要中的HTML
+    使用feedparser的规则解析相对链接并清理（去掉script等），切换引擎不会改变链接和条目指纹。
+
+    Args:
+        content: RSS源响应内容
+        url: 响应的最终地址，没有xml:base时相对链接按它解析
+
+    Yields:
+        条目元组，字段顺序见ITEM_FIELDS
+
+    Raises:
+        FastParseError: 内容不是格式良好的RSS/Atom
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root_checked = False
+    # 各层元素生效的xml:base，与元素的start/end事件一一对应
+    bases = []
+
+    try:
+        for offset in range(0, max(len(content), 1), CHUNK_SIZE):
+            parser.feed(content[offset:offset + CHUNK_SIZE])
+
+            for event, element in parser.read_events():
+                name = _local_name(element.tag)
+
+                if event == 'start':
+                    parent_base = bases[-1] if bases else (url or '')
+                    bases.append(_join_base(parent_base, element.get(XML_BASE)))
+                    if not root_checked:
+                        if name not in ('rss', 'feed', 'RDF'):
+                            raise FastParseError(f"unsupported root element: {name}")
+                        root_checked = True
+                    continue
+
+                base = bases.pop()
+                if name in ('item', 'entry'):
+                    yield _extract_entry(element, base)
+                    element.clear()
+
+        parser.close()
+    except (ET.ParseError, ValueError) as e:
+        # ValueError: 声明了expat不支持的多字节编码（如GBK）
+        raise FastParseError(str(e))
+
+    if not root_checked:
+        raise FastParseError("empty document")
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1] if '}' in tag else tag
+
+
+def _join_base(base: str, xml_base: Optional[str]) -> str:
+    return urljoin(base, xml_base.strip()) if xml_base else base
+
+
+def _extract_entry(element: ET.Element, base: str) -> Tuple[str, str, str, str, str]:
+    title = link = summary = content = published = guid = ''
+    summary_base = content_base = base
+
+    for child in element:
+        name = _local_name(child.tag)
+        text = (child.text or '').strip()
+        child_base = _join_base(base, child.get(XML_BASE))
+
+        if name == 'title':
+            title = text
+        elif name == 'link':
+            # Atom的链接在href属性中，优先使用rel=alternate的链接
+            href = child.get('href')
+            if href is not None:
+                if not link or child.get('rel', 'alternate') == 'alternate':
+                    link = _resolve(child_base, href.strip())
+            elif text:
+                link = _resolve(child_base, text)
+        elif name in ('description', 'summary'):
+            summary = _inner_text(child) if len(child) else (child.text or '')
+            summary_base = child_base
+        elif name in ('encoded', 'content'):
+            content = _inner_text(child) if len(child) else (child.text or '')
+            content_base = child_base
+        elif name in ('pubDate', 'published', 'issued'):
+            published = text
+        elif name in ('guid', 'id'):
+            # 与feedparser一致，ID也按URI解析，RSS中isPermaLink="false"的guid除外
+            guid = text if child.get('isPermaLink', '').lower() == 'false' else _resolve(child_base, text)
+
+    if summary:
+        summary = _clean_html(summary, summary_base)
+    else:
+        summary = _clean_html(content, content_base)
+    return (title, link, summary, published, guid or link)
+
+
+def _resolve(base: str, uri: str) -> str:
+    return urljoin(base, uri) if base and uri else uri
+
+
+def _clean_html(html: str, base: str) -> str:
+    """与feedparser处理摘要的方式相同：解析相对链接后清理不安全的标签和属性，纯文本直接返回"""
+    if '<' not in html:
+        return html
+    if base:
+        html = resolve_relative_uris(html, base, 'utf-8', 'text/html')
+    return _sanitize_html(html, 'utf-8', 'text/html')
+
+
+def _inner_text(element: ET.Element) -> str:
+    """
+    Atom中type="xhtml"的内容以子元素形式出现，序列化为HTML字符串
+
+    与feedparser一致，去掉外层的div和XHTML命名空间前缀。
+    """
+    if len(element) == 1 and not (element.text or '').strip() and _local_name(element[0].tag) == 'div':
+        element = element[0]
+    for descendant in element.iter():
+        descendant.tag = _local_name(descendant.tag)
+    parts = [element.text or '']
+    for child in element:
+        parts.append(ET.tostring(child, encoding='unicode'))
+    return ''.join(parts)
@@ -0,0 +1,252 @@
+import time
+import socket
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from utils.Logger import get_logger
+
+log = get_logger(__name__)
+
+
+class HostLimiter:
+    """单个主机的并发数和请求频率限制"""
+
+    def __init__(self, max_concurrency: int = 0, requests_per_second: float = 0):
+        """
+        Args:
+            max_concurrency: 同时进行的最大请求数，0表示不限制
+            requests_per_second: 每秒最多发起的请求数，0表示不限制
+        """
+        self.semaphore = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.lock = threading.Lock()
+        self.next_allowed = 0.0
+
+    def acquire(self):
+        """等待直到可以向该主机发起下一个请求"""
+        if self.semaphore:
+            self.semaphore.acquire()
+
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_allowed)
+            self.next_allowed = start + self.min_interval
+
+        if start > now:
+            time.sleep(start - now)
+
+    def release(self):
+        if self.semaphore:
+            self.semaphore.release()
+
+    def pause(self, seconds: float):
+        """在接下来的一段时间内暂停向该主机发起请求（例如收到429之后）"""
+        with self.lock:
+            self.next_allowed = max(self.next_allowed, time.monotonic() + seconds)
+
+
+class DNSCache:
+    """
+    带过期时间的DNS解析缓存
+
+    通过替换socket.getaddrinfo生效，对进程内所有连接（包括urllib3连接池新建的连接）都有效。
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.cache = {}
+        self.lock = threading.Lock()
+        self.original_getaddrinfo = socket.getaddrinfo
+
+    def install(self):
+        socket.getaddrinfo = self.getaddrinfo
+
+    def getaddrinfo(self, host, port, *args, **kwargs):
+        key = (host, port, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached and cached[0] > now:
+                return cached[1]
+
+        result = self.original_getaddrinfo(host, port, *args, **kwargs)
+        with self.lock:
+            self.cache[key] = (now + self.ttl, result)
+        return result
+
+
+class HttpClient:
+    """
+    共享的HTTP客户端
+
+    所有抓取和推送请求都通过同一个requests.Session发出，按主机复用keep-alive连接，
+    并对每个主机限制并发数和请求频率，收到429时按Retry-After暂停对该主机的请求。
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Args:
+            config: 完整的配置字典，读取其中的http部分
+        """
+        http_config = (config or {}).get('http', {}) or {}
+
+        self.default_timeout = http_config.get('timeout', 30)
+        self.max_retry_after = http_config.get('max_retry_after', 300)
+        self.default_limits = {
+            'max_concurrency': http_config.get('max_concurrency_per_host', 4),
+            'requests_per_second': http_config.get('requests_per_second_per_host', 0)
+        }
+        self.host_config = http_config.get('hosts', {}) or {}
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+        pool_maxsize = http_config.get('pool_maxsize', 10)
+        adapter = HTTPAdapter(pool_connections=http_config.get('pool_connections', 20), pool_maxsize=pool_maxsize)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = http_config.get('user_agent', 'FeedGrep/1.0')
+        # 总是请求压缩传输；安装了brotli时urllib3会同时声明并支持br
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING.replace(',', ', ')
+
+        dns_cache_ttl = http_config.get('dns_cache_ttl', 300)
+        if dns_cache_ttl:
+            install_dns_cache(dns_cache_ttl)
+
+    def get_limiter(self, host: str) -> HostLimiter:
+        """获取指定主机的限流器"""
+        with self.lock:
+            limiter = self.limiters.get(host)
+            if limiter is None:
+                limits = dict(self.default_limits)
+                limits.update(self.host_config.get(host, {}) or {})
+                limiter = HostLimiter(limits.get('max_concurrency', 0), limits.get('requests_per_second', 0))
+                self.limiters[host] = limiter
+            return limiter
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        发起HTTP请求，参数与requests.Session.request相同
+
+        stream=True时响应正文在返回之后才读取，该主机的并发名额一直占用到响应关闭（调用方需要关闭响应，
+        例如使用with response:），否则并发限制只覆盖到收到响应头为止。
+
+        Returns:
+            响应对象
+        """
+        kwargs.setdefault('timeout', self.default_timeout)
+        host = urlparse(url).hostname or ''
+        limiter = self.get_limiter(host)
+
+        limiter.acquire()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except BaseException:
+            limiter.release()
+            raise
+
+        if kwargs.get('stream'):
+            _release_on_close(response, limiter)
+        else:
+            limiter.release()
+
+        if response.status_code in (429, 503):
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if response.status_code == 429 or retry_after:
+                delay = min(retry_after or 60, self.max_retry_after)
+                log.warning(f"Host {host} returned {response.status_code}, pausing requests for {delay:.0f}s")
+                limiter.pause(delay)
+
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request('PATCH', url, **kwargs)
+
+
+def _release_on_close(response: requests.Response, limiter: HostLimiter):
+    """关闭流式响应时释放主机的并发名额（多次关闭只释放一次）"""
+    close = response.close
+    released = []
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            if not released:
+                released.append(True)
+                limiter.release()
+
+    response.close = close_and_release
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """解析Retry-After响应头（只支持秒数格式），无法解析时返回0"""
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return 0.0
+
+
+_dns_cache = None
+_dns_lock = threading.Lock()
+_client = None
+_client_lock = threading.Lock()
+
+
+def install_dns_cache(ttl: float):
+    """安装进程级的DNS缓存，重复调用只更新过期时间"""
+    global _dns_cache
+    with _dns_lock:
+        if _dns_cache is None:
+            _dns_cache = DNSCache(ttl)
+            _dns_cache.install()
+        else:
+            _dns_cache.ttl = ttl
+
+
+def configure_http_client(config: Optional[Dict] = None) -> HttpClient:
+    """
+    按配置创建共享的HTTP客户端，替换已有的客户端
+
+    Args:
+        config: 完整的配置字典
+
+    Returns:
+        共享的HTTP客户端
+    """
+    global _client
+    client = HttpClient(config)
+    _client = client
+    return client
+
+
+def get_http_client(config: Optional[Dict] = None) -> HttpClient:
+    """
+    获取共享的HTTP客户端，尚未创建时按传入的配置创建
+
+    Args:
+        config: 完整的配置字典，只在首次创建时使用
+
+    Returns:
+        共享的HTTP客户端
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient(config)
+    return _client
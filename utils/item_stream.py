@@ -0,0 +1,264 @@
+import json
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from utils.db import Database
+from utils.Logger import get_logger
+from utils.serialize import encode_rows
+
+log = get_logger(__name__)
+
+# 推送的条目字段（列表接口中的摘要，完整内容通过/api/items/{item_id}获取），rules为匹配的关键词规则ID
+STREAM_FIELDS = ('id', 'title', 'link', 'description', 'pub_date', 'category', 'source_name', 'created_at', 'rules')
+
+# 心跳注释，保持连接不被代理关闭，也用于及时发现已断开的连接
+HEARTBEAT = b': ping\n\n'
+
+
+def _message(event: str, data: str, event_id: Optional[int] = None) -> bytes:
+    """编码一条SSE消息，带ID时客户端重连会在Last-Event-ID中带回"""
+    prefix = f"id: {event_id}\n" if event_id is not None else ''
+    return f"{prefix}event: {event}\ndata: {data}\n\n".encode('utf-8')
+
+
+class StreamEvent:
+    """共享缓冲区中的一个条目事件，SSE消息只编码一次，所有订阅者共用"""
+
+    __slots__ = ('item_id', 'category', 'source_name', 'rules', 'message')
+
+    def __init__(self, item_id: int, category: str, source_name: str, rules: List[str], message: bytes):
+        self.item_id = item_id
+        self.category = category
+        self.source_name = source_name
+        self.rules = rules
+        self.message = message
+
+
+class StreamSubscriber:
+    """一个SSE连接：筛选条件和有界的待发送队列"""
+
+    def __init__(self, category: Optional[str], source: Optional[str], rule: Optional[str], queue_size: int):
+        self.category = category
+        self.source = source
+        self.rule = rule
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def matches(self, event: StreamEvent) -> bool:
+        if self.category and event.category != self.category:
+            return False
+        if self.source and event.source_name != self.source:
+            return False
+        if self.rule and self.rule not in event.rules:
+            return False
+        return True
+
+    def offer(self, message: bytes) -> bool:
+        """
+        把消息放入待发送队列
+
+        Returns:
+            队列已满（客户端读取太慢）时返回False
+        """
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self):
+        """丢弃未发送的消息，通知发送端结束连接"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class ItemStream:
+    """
+    新条目的实时推送（Server-Sent Events）
+
+    批次写入新条目后（同一进程中由数据版本的回调立即唤醒，抓取进程单独运行时按poll_seconds轮询数据版本），
+    按ID读取新条目，每个条目只查询和编码一次，放入共享的环形缓冲区并分发给所有筛选条件匹配的订阅者。
+    每个订阅者的待发送队列有上限，队列满时（客户端读取跟不上）断开该订阅者，不会拖慢其他订阅者，也不会无限占用内存；
+    客户端重连时带上Last-Event-ID，从缓冲区中补发断开期间的条目，超出缓冲区范围时发送reset事件，由客户端重新加载。
+    """
+
+    def __init__(self, db: Database, config: Optional[Dict], run_query: Callable[..., Awaitable]):
+        """
+        Args:
+            db: 数据库连接管理对象
+            config: 完整的配置字典，读取其中的api.stream部分
+            run_query: 在查询线程池中执行同步数据库访问的协程函数（FeedGrepAPI.run_query）
+        """
+        stream_config = (((config or {}).get('api', {}) or {}).get('stream', {}) or {})
+
+        self.db = db
+        self.run_query = run_query
+        self.buffer_size = max(1, stream_config.get('buffer_size', 1000))
+        self.queue_size = max(1, stream_config.get('queue_size', 256))
+        self.heartbeat_seconds = stream_config.get('heartbeat_seconds', 15)
+        self.poll_seconds = stream_config.get('poll_seconds', 5)
+        self.retry_ms = stream_config.get('retry_ms', 3000)
+
+        # 缓冲区中的事件覆盖ID在(floor_id, last_id]范围内的所有条目
+        self.buffer = deque(maxlen=self.buffer_size)
+        self.floor_id = None
+        self.last_id = None
+        self.subscribers: Set[StreamSubscriber] = set()
+        self.evictions = 0
+
+        self.loop = None
+        self.wakeup = None
+        self.task = None
+        db.add_data_listener(self.notify)
+
+    def notify(self, version: int):
+        """数据版本递增后的回调，可能在抓取线程中调用"""
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.wakeup.set)
+
+    async def subscribe(self, category: Optional[str] = None, source: Optional[str] = None,
+                        rule: Optional[str] = None, last_event_id: Optional[int] = None) -> StreamSubscriber:
+        """
+        添加订阅者
+
+        Args:
+            category: 只推送该分类的条目
+            source: 只推送该来源的条目
+            rule: 只推送匹配该关键词规则的条目
+            last_event_id: 客户端收到的最后一个条目ID（重连时），之后的条目从缓冲区补发
+
+        Returns:
+            订阅者，通过events读取要发送的消息
+        """
+        await self._ensure_started()
+        subscriber = StreamSubscriber(category, source, rule, self.queue_size)
+
+        if last_event_id is not None and last_event_id < self.last_id:
+            missed = [event for event in self.buffer if event.item_id > last_event_id and subscriber.matches(event)]
+            if last_event_id < self.floor_id or len(missed) >= self.queue_size:
+                # 缺失的条目已不在缓冲区中，客户端需要重新加载列表，之后从最新的条目继续推送
+                subscriber.offer(_message('reset', json.dumps({'last_id': self.last_id}), self.last_id))
+            else:
+                for event in missed:
+                    subscriber.offer(event.message)
+
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: StreamSubscriber):
+        self.subscribers.discard(subscriber)
+
+    async def events(self, subscriber: StreamSubscriber) -> AsyncIterator[bytes]:
+        """
+        订阅者的SSE消息流，连接结束时（客户端断开或被断开）自动取消订阅
+
+        Yields:
+            SSE消息
+        """
+        try:
+            yield f"retry: {self.retry_ms}\n\n".encode('utf-8')
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                if message is None:
+                    yield _message('evicted', json.dumps({'reason': 'slow consumer'}))
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> Dict:
+        return {
+            'subscribers': len(self.subscribers),
+            'buffered': len(self.buffer),
+            'last_id': self.last_id,
+            'evictions': self.evictions
+        }
+
+    async def _ensure_started(self):
+        """第一个订阅者连接时启动监听任务"""
+        if self.last_id is None:
+            last_id = await self.run_query(self._max_item_id)
+            if self.last_id is None:
+                self.last_id = self.floor_id = last_id
+        if self.task is None or self.task.done():
+            self.loop = asyncio.get_running_loop()
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self._watch())
+
+    async def _watch(self):
+        # 第一次检查时总是读取一次新条目，覆盖读取最大ID之后、监听开始之前写入的条目
+        version = None
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+            try:
+                current = await self.run_query(self.db.get_data_version, self.poll_seconds)
+                if current == version:
+                    continue
+                version = current
+                await self._refresh()
+            except Exception as e:
+                log.error(f"Error refreshing item stream: {e}")
+
+    async def _refresh(self):
+        """读取新条目放入缓冲区并分发给订阅者"""
+        while True:
+            rows, matches = await self.run_query(self._load_new_items, self.last_id, self.buffer_size)
+            if not rows:
+                return
+
+            rules = {}
+            for item_id, rule_id in matches:
+                rules.setdefault(item_id, []).append(rule_id)
+
+            for row in rows:
+                item_rules = rules.get(row[0], [])
+                data = encode_rows(STREAM_FIELDS, [row + (item_rules,)])[0]
+                event = StreamEvent(row[0], row[5], row[6], item_rules, _message('item', data, row[0]))
+                if len(self.buffer) == self.buffer.maxlen:
+                    self.floor_id = self.buffer[0].item_id
+                self.buffer.append(event)
+                self.last_id = event.item_id
+                self._publish(event)
+
+            if len(rows) < self.buffer_size:
+                return
+
+    def _publish(self, event: StreamEvent):
+        for subscriber in list(self.subscribers):
+            if subscriber.matches(event) and not subscriber.offer(event.message):
+                self.unsubscribe(subscriber)
+                subscriber.close()
+                self.evictions += 1
+                log.warning(f"Evicted slow stream subscriber ({self.queue_size} messages pending).")
+
+    def _max_item_id(self) -> int:
+        with self.db.reader() as conn:
+            return conn.execute('SELECT COALESCE(MAX(id), 0) FROM feedgrep_items').fetchone()[0]
+
+    def _load_new_items(self, after_id: int, limit: int) -> Tuple[List[tuple], List[tuple]]:
+        """读取ID大于after_id的条目（按ID顺序）及其匹配的关键词规则"""
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute('''
+                SELECT id, title, link, description, pub_date, category, source_name, created_at
+                FROM feedgrep_items WHERE id > ? ORDER BY id LIMIT ?
+            ''', (after_id, limit)).fetchall()
+            matches = []
+            if rows:
+                matches = cursor.execute(
+                    'SELECT item_id, rule_id FROM keyword_matches WHERE item_id > ? AND item_id <= ?',
+                    (after_id, rows[-1][0])
+                ).fetchall()
+        return rows, matches
@@ -0,0 +1,231 @@
+from collections import deque
+from typing import Dict, List, Optional, Set
+
+from utils.Logger import get_logger
+from utils.content import decode_content, html_to_text
+from utils.db import Database
+from utils.search import parse_keywords
+
+log = get_logger(__name__)
+
+# 与SQLite的LIKE一致：只有ASCII字母不区分大小写
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+class KeywordRule:
+    """default_keywords中的一条关键词规则"""
+
+    def __init__(self, expression: str, rule_id: Optional[str] = None, push_channels: Optional[List[str]] = None):
+        """
+        Args:
+            expression: 关键词表达式，语法见utils.search.parse_keywords
+            rule_id: 规则ID，未指定时使用规范化后的关键词表达式
+            push_channels: 匹配后推送的渠道
+        """
+        self.normal, self.required, self.excluded = (
+            [_normalize(kw) for kw in keywords] for keywords in parse_keywords(expression)
+        )
+        self.expression = ' '.join((expression or '').split())
+        self.rule_id = str(rule_id) if rule_id else self.expression
+        self.push_channels = push_channels or []
+
+    def matches(self, found: Set[str]) -> bool:
+        """
+        按已出现的关键词判断是否匹配，与SQL查询的语义一致
+
+        Args:
+            found: 在标题或摘要中出现过的关键词（已规范化）
+        """
+        if self.normal and not any(kw in found for kw in self.normal):
+            return False
+        if not all(kw in found for kw in self.required):
+            return False
+        return not any(kw in found for kw in self.excluded)
+
+    def __repr__(self):
+        return f"KeywordRule({self.rule_id!r})"
+
+
+def load_keyword_rules(config: Optional[Dict]) -> List[KeywordRule]:
+    """
+    读取配置中的default_keywords
+
+    每一项可以直接是关键词表达式字符串，也可以是包含keywords、push_channels和可选id字段的字典。
+
+    Args:
+        config: 完整的配置字典
+
+    Returns:
+        关键词规则列表，顺序与配置一致
+    """
+    rules = []
+    for keyword_config in (config or {}).get('default_keywords', []) or []:
+        if isinstance(keyword_config, dict):
+            rules.append(KeywordRule(
+                keyword_config.get('keywords', ''),
+                keyword_config.get('id'),
+                keyword_config.get('push_channels')
+            ))
+        else:
+            rules.append(KeywordRule(keyword_config))
+    return rules
+
+
+class KeywordMatcher:
+    """
+    一次性编译所有关键词规则，对每个条目只扫描一遍文本就判断出所有匹配的规则
+
+    所有规则中出现的关键词去重后构建一个Aho-Corasick自动机，扫描标题和摘要得到出现过的关键词，
+    再只检查包含这些关键词的规则（以及没有正向关键词、只靠排除词筛选的规则）。
+    规则越多，相对逐条规则做子串查找的优势越大。
+    """
+
+    def __init__(self, rules: List[KeywordRule]):
+        self.rules = rules
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[tuple] = [()]
+
+        # 关键词 -> 包含它作为普通词或必须词的规则下标
+        self.rules_by_keyword: Dict[str, List[int]] = {}
+        # 没有普通词和必须词的规则，任何条目都需要检查
+        self.always_check: List[int] = []
+
+        keywords = set()
+        for index, rule in enumerate(rules):
+            positive = set(rule.normal) | set(rule.required)
+            for kw in positive:
+                self.rules_by_keyword.setdefault(kw, []).append(index)
+            if not positive:
+                self.always_check.append(index)
+            keywords.update(positive)
+            keywords.update(rule.excluded)
+
+        for kw in keywords:
+            self._add_keyword(kw)
+        self._build_failure_links()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> 'KeywordMatcher':
+        return cls(load_keyword_rules(config))
+
+    def _add_keyword(self, keyword: str):
+        state = 0
+        for ch in keyword:
+            next_state = self.goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][ch] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            state = next_state
+        self.output[state] = (keyword,)
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                # 合并后缀状态的输出，扫描时不必再沿失败链查找
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def scan(self, text: str, found: Set[str]):
+        """扫描文本，把出现的关键词加入found"""
+        if not text:
+            return
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for ch in text.translate(_ASCII_LOWER):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found.update(output[state])
+
+    def match(self, title: str, description: str) -> List[KeywordRule]:
+        """
+        返回条目匹配的所有规则
+
+        与SQL查询一致，每个关键词分别在标题或摘要中查找，不跨字段匹配。
+
+        Args:
+            title: 条目标题
+            description: 条目摘要
+
+        Returns:
+            匹配的规则，顺序与配置一致
+        """
+        if not self.rules:
+            return []
+
+        found = set()
+        self.scan(title, found)
+        self.scan(description, found)
+
+        candidates = set(self.always_check)
+        for kw in found:
+            candidates.update(self.rules_by_keyword.get(kw, ()))
+
+        return [self.rules[index] for index in sorted(candidates) if self.rules[index].matches(found)]
+
+
+def backfill_keyword_matches(db: Database, matcher: KeywordMatcher, chunk_size: int = 5000) -> int:
+    """
+    按当前的关键词规则重新计算所有已有条目的匹配记录（修改default_keywords后使用）
+
+    已不在配置中的规则的匹配记录会被删除。条目按ID分块处理，每块一个事务。
+
+    Args:
+        db: 数据库连接管理对象
+        matcher: 按当前配置编译的关键词规则
+        chunk_size: 每个事务处理的条目数
+
+    Returns:
+        写入的匹配记录数
+    """
+    rule_ids = sorted({rule.rule_id for rule in matcher.rules})
+    with db.transaction() as conn:
+        placeholders = ', '.join('?' for _ in rule_ids)
+        conn.execute(f'DELETE FROM keyword_matches WHERE rule_id NOT IN ({placeholders})', rule_ids)
+
+    last_id = 0
+    written = 0
+    while True:
+        with db.reader() as conn:
+            rows = conn.execute('''
+                SELECT i.id, i.title, i.description, i.batch_id, c.encoding, c.content
+                FROM feedgrep_items i LEFT JOIN feedgrep_item_content c ON c.item_id = i.id
+                WHERE i.id > ? ORDER BY i.id LIMIT ?
+            ''', (last_id, max(1, chunk_size))).fetchall()
+        if not rows:
+            break
+
+        # 在事务外完成匹配，写锁只在写入时持有；与写入时一样按完整内容的纯文本匹配
+        matches = [
+            (rule.rule_id, row['id'], row['batch_id'])
+            for row in rows
+            for rule in matcher.match(
+                row['title'],
+                html_to_text(decode_content(row['encoding'], row['content'])) if row['content'] is not None
+                else row['description']
+            )
+        ]
+        with db.transaction() as conn:
+            conn.execute('DELETE FROM keyword_matches WHERE item_id BETWEEN ? AND ?', (rows[0]['id'], rows[-1]['id']))
+            conn.executemany('INSERT OR IGNORE INTO keyword_matches (rule_id, item_id, batch_id) VALUES (?, ?, ?)', matches)
+        written += len(matches)
+        last_id = rows[-1]['id']
+
+    log.info(f"Backfilled {written} keyword matches for {len(rule_ids)} rules.")
+    return written
+
+
+def _normalize(keyword: str) -> str:
+    return keyword.translate(_ASCII_LOWER)
@@ -0,0 +1,425 @@
+import sqlite3
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.Logger import get_logger
+from utils.content import ContentSettings, encode_content, html_to_text, make_snippet
+from utils.db import Database, item_fingerprint
+from utils.search import FTS_TABLE, index_text_rows
+
+log = get_logger(__name__)
+
+# 默认每个事务回填的行数，避免在大数据库上长时间持有写锁
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def _create_base_schema(db: Database, config: Dict):
+    """条目表、增量处理位置表，以及实际查询用到的索引"""
+    with db.transaction() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS feedgrep_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT,
+                link TEXT,
+                description TEXT,
+                pub_date TEXT,
+                guid TEXT,
+                category TEXT,
+                source_name TEXT,
+                batch_id INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # 按批次查找新条目、获取最大批次ID
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_batch_id ON feedgrep_items(batch_id)')
+        # 按时间倒序列出条目
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_created_at ON feedgrep_items(created_at DESC)')
+        # 按分类/来源筛选并按时间倒序列出条目
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_category_created_at ON feedgrep_items(category, created_at DESC)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_source_name_created_at ON feedgrep_items(source_name, created_at DESC)')
+
+        # 记录每个源最近一次处理时的最新条目，用于增量处理时提前停止
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS feed_watermarks (
+                source_name TEXT PRIMARY KEY,
+                latest_guid TEXT,
+                latest_pub_date TEXT,
+                runs_since_full_scan INTEGER DEFAULT 0,
+                unstable INTEGER DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+
+def _add_item_hash(db: Database, config: Dict):
+    """
+    用64位整数指纹item_hash去重
+
+    先建唯一索引再分块回填：重复的旧条目（之前并发写入时可能产生）按ID顺序只有最早的一条
+    得到指纹，其余的留空，不删除任何数据。
+    """
+    chunk_size = _chunk_size(config)
+    with db.transaction() as conn:
+        if 'item_hash' not in _columns(conn, 'feedgrep_items'):
+            conn.execute('ALTER TABLE feedgrep_items ADD COLUMN item_hash INTEGER')
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_item_hash ON feedgrep_items(item_hash)')
+
+    last_id = 0
+    updated = 0
+    while True:
+        with db.transaction() as conn:
+            rows = conn.execute(
+                'SELECT id, source_name, title, link FROM feedgrep_items WHERE id > ? ORDER BY id LIMIT ?',
+                (last_id, chunk_size)
+            ).fetchall()
+            if not rows:
+                break
+
+            # UPDATE OR IGNORE：与已有条目指纹冲突的重复条目保持为空
+            cursor = conn.executemany(
+                'UPDATE OR IGNORE feedgrep_items SET item_hash = ? WHERE id = ?',
+                [(item_fingerprint(row['source_name'], row['title'], row['link']), row['id']) for row in rows]
+            )
+            updated += cursor.rowcount
+            last_id = rows[-1]['id']
+
+    if updated:
+        log.info(f"Computed item_hash for {updated} existing items.")
+
+
+def _drop_unused_indexes(db: Database, config: Dict):
+    """
+    删除查询不会用到的索引
+
+    title/link/guid上的单列索引和四列文本组合索引只服务于早期的逐条存在性检查；
+    category和source_name的单列索引是对应的(列, created_at)组合索引的前缀。
+    """
+    with db.transaction() as conn:
+        for name in ('idx_title', 'idx_guid', 'idx_link', 'idx_category', 'idx_source_name',
+                     'idx_source_title_link_guid'):
+            conn.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def _create_fts_index(db: Database, config: Dict):
+    """
+    标题和完整内容纯文本的trigram全文索引，搜索与写入时的关键词匹配按同样的文本进行
+
+    纯文本由Python从HTML计算，索引表自己保存文本；新条目由insert_items在同一事务中写入索引，
+    条目删除（归档）和标题修改由触发器同步。之后的迁移只截断description，不影响索引。
+
+    已有条目（此时description还是完整内容）按ID分块写入索引，HTML转换在事务外完成；
+    中途退出后重新执行时从已建索引的最大ID之后继续。
+    """
+    chunk_size = _chunk_size(config)
+    with db.transaction() as conn:
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+                title, content,
+                tokenize='trigram'
+            )
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS feedgrep_items_fts_delete AFTER DELETE ON feedgrep_items BEGIN
+                DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS feedgrep_items_fts_update AFTER UPDATE OF title ON feedgrep_items BEGIN
+                UPDATE {FTS_TABLE} SET title = new.title WHERE rowid = new.id;
+            END
+        ''')
+        last_id = conn.execute(f'SELECT COALESCE(MAX(rowid), 0) FROM {FTS_TABLE}').fetchone()[0]
+
+    indexed = 0
+    while True:
+        with db.reader() as conn:
+            rows = conn.execute(
+                'SELECT id, title, description FROM feedgrep_items WHERE id > ? ORDER BY id LIMIT ?',
+                (last_id, chunk_size)
+            ).fetchall()
+        if not rows:
+            break
+
+        with db.transaction() as conn:
+            index_text_rows(conn, [(row['id'], row['title'], html_to_text(row['description'] or '')) for row in rows])
+        indexed += len(rows)
+        last_id = rows[-1]['id']
+
+    if indexed:
+        log.info(f"Indexed {indexed} existing items for full-text search.")
+
+
+def _create_keyword_matches(db: Database, config: Dict):
+    """
+    条目写入时匹配到的关键词规则
+
+    关键词推送和按规则查询条目直接查这张表；条目删除时由触发器删除对应的匹配记录。
+    已有条目的匹配记录需要用 --backfill-matches 命令补齐。
+    """
+    with db.transaction() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS keyword_matches (
+                rule_id TEXT NOT NULL,
+                item_id INTEGER NOT NULL,
+                batch_id INTEGER,
+                PRIMARY KEY (rule_id, item_id)
+            ) WITHOUT ROWID
+        ''')
+        # 按规则查找某个批次的匹配（关键词推送）
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_keyword_matches_rule_batch ON keyword_matches(rule_id, batch_id)')
+        # 按条目删除匹配记录
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_keyword_matches_item ON keyword_matches(item_id)')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS feedgrep_items_keyword_matches_delete AFTER DELETE ON feedgrep_items BEGIN
+                DELETE FROM keyword_matches WHERE item_id = old.id;
+            END
+        ''')
+
+
+def _create_batch_runs(db: Database, config: Dict):
+    """
+    每个批次的开始/结束时间、RSS源和条目计数以及分阶段耗时，主键同时作为批处理ID
+
+    自增序列从已有条目的最大batch_id开始，新批次的ID不会与历史批次重复。
+    """
+    with db.transaction() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS batch_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TEXT,
+                finished_at TEXT,
+                duration_seconds REAL,
+                feeds_attempted INTEGER DEFAULT 0,
+                feeds_skipped INTEGER DEFAULT 0,
+                feeds_succeeded INTEGER DEFAULT 0,
+                feeds_not_modified INTEGER DEFAULT 0,
+                feeds_failed INTEGER DEFAULT 0,
+                items_fetched INTEGER DEFAULT 0,
+                items_inserted INTEGER DEFAULT 0,
+                fetch_seconds REAL DEFAULT 0,
+                parse_seconds REAL DEFAULT 0,
+                dedup_seconds REAL DEFAULT 0,
+                insert_seconds REAL DEFAULT 0,
+                push_seconds REAL DEFAULT 0
+            )
+        ''')
+        if not conn.execute("SELECT 1 FROM sqlite_sequence WHERE name = 'batch_runs'").fetchone():
+            conn.execute('''
+                INSERT INTO sqlite_sequence (name, seq)
+                SELECT 'batch_runs', COALESCE(MAX(batch_id), 0) FROM feedgrep_items
+            ''')
+
+
+def _split_item_content(db: Database, config: Dict):
+    """
+    冷热分离：条目表的description只保存截断后的纯文本摘要，完整内容移到feedgrep_item_content表（可压缩）
+
+    已有条目按ID分块迁移，摘要和压缩在事务外计算。全文索引（迁移4）按完整内容建立，不受截断影响。
+    """
+    settings = ContentSettings(config)
+    chunk_size = _chunk_size(config)
+    with db.transaction() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS feedgrep_item_content (
+                item_id INTEGER PRIMARY KEY,
+                encoding TEXT,
+                content BLOB
+            )
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS feedgrep_items_content_delete AFTER DELETE ON feedgrep_items BEGIN
+                DELETE FROM feedgrep_item_content WHERE item_id = old.id;
+            END
+        ''')
+
+    last_id = 0
+    moved = 0
+    while True:
+        # 中途退出后重新执行时跳过已经迁移过的条目
+        with db.reader() as conn:
+            rows = conn.execute('''
+                SELECT id, description FROM feedgrep_items
+                WHERE id > ? AND NOT EXISTS (SELECT 1 FROM feedgrep_item_content WHERE item_id = feedgrep_items.id)
+                ORDER BY id LIMIT ?
+            ''', (last_id, chunk_size)).fetchall()
+        if not rows:
+            break
+
+        contents = []
+        snippets = []
+        for row in rows:
+            description = row['description'] or ''
+            contents.append((row['id'], *encode_content(description, settings)))
+            snippets.append((make_snippet(html_to_text(description), settings.snippet_length), row['id']))
+
+        with db.transaction() as conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO feedgrep_item_content (item_id, encoding, content) VALUES (?, ?, ?)',
+                contents
+            )
+            conn.executemany('UPDATE feedgrep_items SET description = ? WHERE id = ?', snippets)
+        moved += len(rows)
+        last_id = rows[-1]['id']
+
+    if moved:
+        log.info(f"Moved full content of {moved} existing items to feedgrep_item_content.")
+
+
+def _create_archive_index(db: Database, config: Dict):
+    """
+    归档块的位置索引和已归档条目的指纹，见utils.archive.ItemArchive
+    """
+    with db.transaction() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS archive_blocks (
+                id INTEGER PRIMARY KEY,
+                segment TEXT NOT NULL,
+                category TEXT,
+                byte_offset INTEGER NOT NULL,
+                byte_length INTEGER NOT NULL,
+                item_count INTEGER,
+                min_item_id INTEGER,
+                max_item_id INTEGER,
+                min_created_at TEXT,
+                max_created_at TEXT,
+                archived_at TEXT
+            )
+        ''')
+        # 按分类（或全部）倒序翻页时按最大ID排列块
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_archive_blocks_category ON archive_blocks(category, max_item_id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_archive_blocks_max_item_id ON archive_blocks(max_item_id)')
+        # 已归档条目的指纹，去重时与feedgrep_items一起检查
+        conn.execute('CREATE TABLE IF NOT EXISTS archived_item_hashes (item_hash INTEGER PRIMARY KEY)')
+
+
+def _create_keyset_indexes(db: Database, config: Dict):
+    """
+    列表按(created_at, id)倒序排列并按游标翻页，用包含id的组合索引替换只按created_at排序的索引
+
+    索引中同一created_at的条目按id排列，游标条件和ORDER BY created_at DESC, id DESC都能直接使用索引，
+    不需要额外排序。
+    """
+    with db.transaction() as conn:
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_created_at_id ON feedgrep_items(created_at, id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_category_created_at_id ON feedgrep_items(category, created_at, id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_source_name_created_at_id ON feedgrep_items(source_name, created_at, id)')
+        for name in ('idx_created_at', 'idx_category_created_at', 'idx_source_name_created_at'):
+            conn.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def _create_data_version(db: Database, config: Dict):
+    """
+    条目数据的版本号（只有一行），每个写入了新条目的批次和每次归档后递增，API的响应缓存和ETag据此失效
+
+    初始值取批次ID的自增序列（迁移6从已有条目的最大batch_id开始，batch_runs表本身可能还没有记录），
+    重建数据库后版本号一般不会与之前的重复。
+    """
+    with db.transaction() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS data_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('''
+            INSERT OR IGNORE INTO data_version (id, version)
+            SELECT 1, COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'batch_runs'), 0)
+        ''')
+
+
+def _create_feed_state_tables(db: Database, config: Dict):
+    """
+    RSS源的HTTP校验信息（utils.feed_cache.SQLiteValidatorStore）和健康状态（utils.feed_health.FeedHealthTracker）
+
+    两张表之前由各自的类在初始化时创建，已有的表保留；旧的feed_health表补上流量统计列。
+    """
+    with db.transaction() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS feed_http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                last_status INTEGER,
+                checked_at TEXT
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS feed_health (
+                url TEXT PRIMARY KEY,
+                source_name TEXT,
+                state TEXT DEFAULT 'closed',
+                consecutive_failures INTEGER DEFAULT 0,
+                total_failures INTEGER DEFAULT 0,
+                total_successes INTEGER DEFAULT 0,
+                last_error TEXT,
+                last_failure_at TEXT,
+                last_success_at TEXT,
+                avg_latency_ms REAL,
+                open_until REAL DEFAULT 0
+            )
+        ''')
+        # 流量统计列：最近一次/累计的传输字节数（压缩后）和解压后字节数
+        columns = _columns(conn, 'feed_health')
+        for column in ('last_bytes_transferred', 'last_bytes_decompressed',
+                       'total_bytes_transferred', 'total_bytes_decompressed'):
+            if column not in columns:
+                conn.execute(f'ALTER TABLE feed_health ADD COLUMN {column} INTEGER DEFAULT 0')
+
+
+# (版本号, 说明, 迁移函数)，版本号保存在PRAGMA user_version中，只能追加不能修改
+MIGRATIONS: List[Tuple[int, str, Callable[[Database, Dict], None]]] = [
+    (1, 'base schema', _create_base_schema),
+    (2, 'item_hash fingerprint', _add_item_hash),
+    (3, 'drop unused indexes', _drop_unused_indexes),
+    (4, 'full-text index', _create_fts_index),
+    (5, 'keyword matches', _create_keyword_matches),
+    (6, 'batch runs', _create_batch_runs),
+    (7, 'split item content', _split_item_content),
+    (8, 'archive index', _create_archive_index),
+    (9, 'keyset pagination indexes', _create_keyset_indexes),
+    (10, 'data version', _create_data_version),
+    (11, 'feed validators and health', _create_feed_state_tables),
+]
+
+
+def get_schema_version(db: Database) -> int:
+    """读取数据库当前的结构版本"""
+    with db.reader() as conn:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(db: Database, config: Optional[Dict] = None) -> int:
+    """
+    依次执行尚未执行的迁移
+
+    每个迁移自行控制事务（大表回填按块提交），全部完成后才更新版本号，
+    中途退出时下次启动会重新执行该迁移，因此迁移必须可以重复执行。
+
+    Args:
+        db: 数据库连接管理对象
+        config: 完整的配置字典，读取其中的database.migration_chunk_size和storage部分
+
+    Returns:
+        迁移后的结构版本
+    """
+    config = config or {}
+    version = get_schema_version(db)
+    for target, description, apply in MIGRATIONS:
+        if target <= version:
+            continue
+        log.info(f"Migrating database {db.db_path} to schema version {target}: {description}")
+        apply(db, config)
+        with db.transaction() as conn:
+            conn.execute(f'PRAGMA user_version = {target}')
+        version = target
+    return version
+
+
+def _chunk_size(config: Dict) -> int:
+    """回填数据时每个事务处理的行数"""
+    return max(1, (config.get('database', {}) or {}).get('migration_chunk_size', DEFAULT_CHUNK_SIZE))
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
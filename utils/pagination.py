@@ -0,0 +1,61 @@
+import json
+import base64
+from typing import Dict, List, Optional, Tuple
+
+# 在线条目的排序，同一秒入库的条目按ID区分，保证顺序唯一
+ORDER_BY = 'created_at DESC, id DESC'
+
+
+class Cursor:
+    """
+    分页游标，指向上一页的最后一个条目
+
+    在线条目按(created_at, id)定位，下一页只需从索引中该位置之后继续读取，
+    翻页再深代价也不变；归档条目（在线条目之后）按ID定位。
+    """
+
+    def __init__(self, created_at: Optional[str] = None, item_id: int = 0, archived: bool = False):
+        self.created_at = created_at
+        self.item_id = item_id
+        self.archived = archived
+
+    @classmethod
+    def after(cls, item: Dict) -> 'Cursor':
+        """指向某个条目之后的游标"""
+        if item.get('archived'):
+            return cls(item_id=item['id'], archived=True)
+        return cls(item['created_at'], item['id'])
+
+    def encode(self) -> str:
+        """编码为不透明的字符串（URL安全）"""
+        payload = {'a': self.item_id} if self.archived else {'c': self.created_at, 'i': self.item_id}
+        data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+    @classmethod
+    def decode(cls, value: str) -> 'Cursor':
+        """
+        解析encode生成的游标
+
+        Raises:
+            ValueError: 游标格式不正确
+        """
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+            if 'a' in payload:
+                return cls(item_id=int(payload['a']), archived=True)
+            if not isinstance(payload['c'], str):
+                raise ValueError
+            return cls(payload['c'], int(payload['i']))
+        except Exception:
+            raise ValueError(f"Invalid cursor: {value}")
+
+    def condition(self) -> Tuple[str, List]:
+        """
+        在线条目在游标之后的WHERE条件，可以使用(created_at, id)组合索引定位
+
+        Returns:
+            (条件SQL, 参数列表)
+        """
+        return '(created_at, id) < (?, ?)', [self.created_at, self.item_id]
+
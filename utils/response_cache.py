@@ -0,0 +1,111 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+from utils.Logger import get_logger
+
+log = get_logger(__name__)
+
+# 每个缓存条目除响应内容外的估算开销（键、ETag和字典节点），单位：字节
+ENTRY_OVERHEAD = 200
+
+
+class ResponseCache:
+    """
+    API响应的LRU缓存
+
+    缓存的是序列化后的响应内容，按规范化后的查询参数索引，总大小超过上限时淘汰最久未使用的条目。
+    数据只在批次写入后变化，每个条目记录生成时的数据版本，数据版本变化后整个缓存失效。
+    ETag由数据版本和查询参数计算，判断客户端缓存是否仍然有效不需要读取缓存内容，也不需要查询数据库。
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Args:
+            config: 完整的配置字典，读取其中的api.response_cache部分
+        """
+        cache_config = ((config or {}).get('api', {}) or {}).get('response_cache', {}) or {}
+
+        self.enabled = cache_config.get('enabled', True)
+        self.max_bytes = max(0, cache_config.get('max_memory_mb', 32)) * 1024 * 1024
+        self.entries = OrderedDict()
+        self.size = 0
+        self.version = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def etag(key: Hashable, version: int) -> str:
+        """
+        计算响应的ETag
+
+        Args:
+            key: 规范化后的查询参数
+            version: 数据版本
+        """
+        digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=8).hexdigest()
+        return f'"{version}-{digest}"'
+
+    def get(self, key: Hashable, version: int) -> Optional[bytes]:
+        """
+        读取缓存的响应内容
+
+        Returns:
+            响应内容，没有缓存或缓存的数据版本已过期时返回None
+        """
+        if not self.enabled:
+            return None
+        with self.lock:
+            self._check_version(version)
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Hashable, version: int, body: bytes):
+        """
+        缓存响应内容
+
+        生成响应期间数据版本已经变化时（查询开始时读取的版本已过期）不缓存。
+        """
+        if not self.enabled:
+            return
+        entry_size = len(body) + ENTRY_OVERHEAD
+        if entry_size > self.max_bytes:
+            return
+        with self.lock:
+            self._check_version(version)
+            if version != self.version:
+                return
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous) + ENTRY_OVERHEAD
+            self.entries[key] = body
+            self.size += entry_size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted) + ENTRY_OVERHEAD
+
+    def _check_version(self, version: int):
+        # 只接受更新的版本，慢请求带着旧版本回来时不会清空新版本的缓存
+        if self.version is None or version > self.version:
+            if self.entries:
+                log.debug(f"Data version changed to {version}, dropping {len(self.entries)} cached responses.")
+            self.entries.clear()
+            self.size = 0
+            self.version = version
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'version': self.version
+            }
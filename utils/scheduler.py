@@ -0,0 +1,152 @@
+import heapq
+import random
+import time
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class AdaptiveFeedScheduler:
+    """
+    按RSS源自适应调度的优先队列
+
+    每个RSS源各自维护下一次抓取时间，抓取后根据该源的更新节奏重新计算间隔，
+    并在间隔上叠加随机抖动，使各源的抓取时间均匀分散，不会在同一时刻集中请求。
+    """
+
+    def __init__(self, default_interval: float, min_interval: float, max_interval: float,
+                 jitter: float = 0.2, coalesce_seconds: float = 5.0):
+        """
+        Args:
+            default_interval: 没有历史数据时使用的抓取间隔（秒）
+            min_interval: 默认的最小抓取间隔（秒）
+            max_interval: 默认的最大抓取间隔（秒）
+            jitter: 抖动比例，实际间隔在 interval * (1 ± jitter) 之间随机
+            coalesce_seconds: 到期时间相差在此范围内的源合并为同一批处理
+        """
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.coalesce_seconds = coalesce_seconds
+
+        self.heap = []
+        self.tasks = {}
+        self.intervals = {}
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    def add(self, key: str, task: Dict, delay: float = 0.0):
+        """
+        加入一个RSS源
+
+        Args:
+            key: RSS源的唯一标识
+            task: RSS源任务信息
+            delay: 距离首次抓取的秒数
+        """
+        with self.lock:
+            self.tasks[key] = task
+            self._push(key, time.time() + delay)
+
+    def reschedule(self, key: str, interval: float):
+        """
+        按新的抓取间隔安排RSS源的下一次抓取
+
+        Args:
+            key: RSS源的唯一标识
+            interval: 抓取间隔（秒），会叠加随机抖动
+        """
+        with self.lock:
+            if key not in self.tasks:
+                return
+            self.intervals[key] = interval
+            delay = interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            self._push(key, time.time() + delay)
+
+    def pop_due(self, now: Optional[float] = None) -> List[Dict]:
+        """
+        取出所有已到期的RSS源
+
+        Args:
+            now: 当前时间戳，为空时使用time.time()
+
+        Returns:
+            到期的RSS源任务列表（按到期时间排序）
+        """
+        if now is None:
+            now = time.time()
+
+        due = []
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now + self.coalesce_seconds:
+                _, _, key = heapq.heappop(self.heap)
+                if key in self.tasks:
+                    due.append(self.tasks[key])
+        return due
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """距离下一个RSS源到期的秒数，队列为空时返回默认间隔"""
+        if now is None:
+            now = time.time()
+
+        with self.lock:
+            if not self.heap:
+                return self.default_interval
+            return max(0.0, self.heap[0][0] - now)
+
+    def snapshot(self) -> List[Dict]:
+        """
+        当前调度状态
+
+        Returns:
+            每个RSS源的下一次抓取时间和当前间隔
+        """
+        with self.lock:
+            entries = sorted(self.heap)
+            return [
+                {
+                    'key': key,
+                    'next_due': datetime.fromtimestamp(due).isoformat(timespec='seconds'),
+                    'interval_seconds': round(self.intervals.get(key, self.default_interval))
+                }
+                for due, _, key in entries
+            ]
+
+    def _push(self, key: str, due: float):
+        self.counter += 1
+        heapq.heappush(self.heap, (due, self.counter, key))
+
+
+def estimate_interval(timestamps: List[float], now: float, default_interval: float,
+                      min_interval: float, max_interval: float, factor: float = 0.5) -> float:
+    """
+    根据RSS源出现新条目的历史时间估算抓取间隔
+
+    取相邻两次出现新条目的时间差（包括最后一次到现在的时间差）的中位数，
+    乘以factor作为抓取间隔，再限制在[min_interval, max_interval]之间。
+
+    Args:
+        timestamps: 出现新条目的时间戳列表
+        now: 当前时间戳
+        default_interval: 历史数据不足时使用的间隔（秒）
+        min_interval: 最小间隔（秒）
+        max_interval: 最大间隔（秒）
+        factor: 间隔与更新周期的比例
+
+    Returns:
+        抓取间隔（秒）
+    """
+    timestamps = sorted(timestamps)
+    if len(timestamps) < 2:
+        interval = default_interval
+    else:
+        gaps = [b - a for a, b in zip(timestamps, timestamps[1:])]
+        # 最后一次更新之后的空窗期也算作一个样本，让停更的源逐渐降低抓取频率
+        open_gap = now - timestamps[-1]
+        if open_gap > 0:
+            gaps.append(open_gap)
+        gaps.sort()
+        interval = gaps[len(gaps) // 2] * factor
+
+    return min(max(interval, min_interval), max_interval)
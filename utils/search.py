@@ -0,0 +1,172 @@
+from typing import Iterable, List, Tuple
+
+from utils.Logger import get_logger
+from utils.content import decode_content, html_to_text
+from utils.db import Database
+
+log = get_logger(__name__)
+
+# 标题和完整内容纯文本的全文索引表（trigram分词，中文关键词无需分词即可按子串匹配）
+FTS_TABLE = 'feedgrep_items_fts'
+
+# 默认每个事务写入索引的条目数
+DEFAULT_INDEX_CHUNK_SIZE = 5000
+
+# trigram索引只能查找不短于3个字符的子串，更短的关键词退回LIKE
+MIN_MATCH_LENGTH = 3
+
+
+def parse_keywords(expression: str) -> Tuple[List[str], List[str], List[str]]:
+    """
+    解析关键词语法
+
+    普通词：包含其中任意一个词就会被捕获，多个关键词使用空格分隔
+    必须词：必须同时包含普通词和必须词才会被捕获，使用+分隔
+    排除词：包含过滤词的新闻会被直接排除，即使包含关键词，使用-分隔
+
+    Args:
+        expression: 关键词表达式，如 "AI 人工智能 +模型 -广告"
+
+    Returns:
+        (普通关键词, 必须关键词, 排除关键词)
+    """
+    normal_keywords = []    # 普通关键词 (空格分隔)
+    required_keywords = []  # 必须包含的关键词 (+)
+    excluded_keywords = []  # 必须排除的关键词 (-)
+
+    for part in (expression or '').split():
+        if part.startswith('+'):
+            keywords, part = required_keywords, part[1:]
+        elif part.startswith('-'):
+            keywords, part = excluded_keywords, part[1:]
+        else:
+            keywords = normal_keywords
+        if part:
+            keywords.append(part)
+
+    return normal_keywords, required_keywords, excluded_keywords
+
+
+def build_keyword_condition(expression: str) -> Tuple[str, List]:
+    """
+    把关键词表达式编译为feedgrep_items上的WHERE条件
+
+    不短于3个字符的关键词编译为全文索引的MATCH子查询，更短的关键词用LIKE匹配索引中的标题和内容。
+    两者都按标题和完整内容的纯文本匹配（与写入时记录的keyword_matches一致）：按子串匹配，ASCII字母不区分大小写。
+
+    Args:
+        expression: 关键词表达式
+
+    Returns:
+        (条件SQL, 参数列表)，表达式中没有关键词时条件为空字符串
+    """
+    normal_keywords, required_keywords, excluded_keywords = parse_keywords(expression)
+    conditions = []
+    params = []
+
+    # 普通关键词 (OR关系)
+    if normal_keywords:
+        or_conditions = []
+        long_keywords = [kw for kw in normal_keywords if len(kw) >= MIN_MATCH_LENGTH]
+        if long_keywords:
+            or_conditions.append(_match_condition('IN'))
+            params.append(' OR '.join(_phrase(kw) for kw in long_keywords))
+        for kw in normal_keywords:
+            if len(kw) < MIN_MATCH_LENGTH:
+                or_conditions.append(_like_condition('IN'))
+                params.extend([f"%{kw}%", f"%{kw}%"])
+        conditions.append("(" + " OR ".join(or_conditions) + ")")
+
+    # 必须关键词 (AND关系)
+    long_keywords = [kw for kw in required_keywords if len(kw) >= MIN_MATCH_LENGTH]
+    if long_keywords:
+        conditions.append(_match_condition('IN'))
+        params.append(' AND '.join(_phrase(kw) for kw in long_keywords))
+    for kw in required_keywords:
+        if len(kw) < MIN_MATCH_LENGTH:
+            conditions.append(_like_condition('IN'))
+            params.extend([f"%{kw}%", f"%{kw}%"])
+
+    # 排除关键词
+    long_keywords = [kw for kw in excluded_keywords if len(kw) >= MIN_MATCH_LENGTH]
+    if long_keywords:
+        conditions.append(_match_condition('NOT IN'))
+        params.append(' OR '.join(_phrase(kw) for kw in long_keywords))
+    for kw in excluded_keywords:
+        if len(kw) < MIN_MATCH_LENGTH:
+            conditions.append(_like_condition('NOT IN'))
+            params.extend([f"%{kw}%", f"%{kw}%"])
+
+    return " AND ".join(conditions), params
+
+
+def index_text_rows(conn, rows: Iterable[Tuple[int, str, str]]):
+    """
+    把条目写入全文索引（已有同一ID的索引时覆盖），与条目的写入在同一事务中执行
+
+    Args:
+        conn: 写连接
+        rows: (条目ID, 标题, 完整内容的纯文本)
+    """
+    conn.executemany(f'INSERT OR REPLACE INTO {FTS_TABLE}(rowid, title, content) VALUES (?, ?, ?)', rows)
+
+
+def _index_existing_items(db: Database, after_id: int = 0, chunk_size: int = DEFAULT_INDEX_CHUNK_SIZE) -> int:
+    """
+    按ID分块把已有条目的标题和完整内容写入全文索引，内容的解压和HTML转换在事务外完成
+
+    Args:
+        db: 数据库连接管理对象
+        after_id: 只索引ID大于该值的条目
+        chunk_size: 每个事务写入的条目数
+
+    Returns:
+        写入索引的条目数
+    """
+    indexed = 0
+    while True:
+        with db.reader() as conn:
+            rows = conn.execute('''
+                SELECT i.id, i.title, i.description, c.encoding, c.content
+                FROM feedgrep_items i LEFT JOIN feedgrep_item_content c ON c.item_id = i.id
+                WHERE i.id > ? ORDER BY i.id LIMIT ?
+            ''', (after_id, max(1, chunk_size))).fetchall()
+        if not rows:
+            break
+
+        # 没有完整内容的条目（内容表之前写入的）按摘要索引
+        text_rows = [(
+            row['id'],
+            row['title'],
+            html_to_text(decode_content(row['encoding'], row['content'])) if row['content'] is not None
+            else row['description']
+        ) for row in rows]
+        with db.transaction() as conn:
+            index_text_rows(conn, text_rows)
+        indexed += len(rows)
+        after_id = rows[-1]['id']
+    return indexed
+
+
+def rebuild_fts_index(db: Database, chunk_size: int = DEFAULT_INDEX_CHUNK_SIZE):
+    """按feedgrep_items和完整内容重建全文索引（索引损坏或手工修改过数据后使用）"""
+    log.info(f"Rebuilding full-text index {FTS_TABLE}...")
+    with db.transaction() as conn:
+        conn.execute(f'DELETE FROM {FTS_TABLE}')
+    indexed = _index_existing_items(db, 0, chunk_size)
+    with db.transaction() as conn:
+        conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    log.info(f"Full-text index {FTS_TABLE} rebuilt ({indexed} items).")
+
+
+def _match_condition(operator: str) -> str:
+    return f"id {operator} (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?)"
+
+
+def _like_condition(operator: str) -> str:
+    return f"id {operator} (SELECT rowid FROM {FTS_TABLE} WHERE title LIKE ? OR content LIKE ?)"
+
+
+def _phrase(keyword: str) -> str:
+    """把关键词转为FTS5的短语，避免其中的引号、括号等被当作查询语法"""
+    return '"' + keyword.replace('"', '""') + '"'
@@ -0,0 +1,170 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from utils.Logger import get_logger
+
+log = get_logger(__name__)
+
+# 布隆过滤器的哈希函数个数范围
+MIN_HASHES = 1
+MAX_HASHES = 8
+
+_MASK_32 = 0xFFFFFFFF
+
+
+class BloomFilter:
+    """
+    以64位条目指纹为输入的布隆过滤器
+
+    指纹本身已是均匀分布的哈希值，直接拆成高低两个32位整数做双重哈希，不再重复计算哈希。
+    """
+
+    def __init__(self, memory_bytes: int, num_hashes: int):
+        """
+        Args:
+            memory_bytes: 位数组占用的字节数
+            num_hashes: 每个元素设置的位数
+        """
+        self.num_bits = max(8, memory_bytes * 8)
+        self.num_hashes = num_hashes
+        self.bits = bytearray(self.num_bits // 8)
+        self.count = 0
+
+    def _positions(self, value: int) -> Iterable[int]:
+        value &= 0xFFFFFFFFFFFFFFFF
+        h1 = value & _MASK_32
+        h2 = (value >> 32) | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, value: int):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: int) -> bool:
+        for position in self._positions(value):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def false_positive_rate(self) -> float:
+        """按已加入的元素个数估算当前的误判率"""
+        if not self.count:
+            return 0.0
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class SeenFilter:
+    """
+    进程内的已保存条目指纹集合，用于在查询数据库前判断条目是否已存在
+
+    两层结构：
+    - 最近的若干个指纹精确保存在LRU集合中，命中即确定已存在，不查数据库也不写入；
+    - 所有指纹加入布隆过滤器，布隆过滤器中没有即确定是新条目，不查数据库直接写入。
+    两层都无法确定时（较旧的条目或布隆过滤器误判）返回None，由调用方查询数据库。
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Args:
+            config: 完整的配置字典，读取其中的seen_filter部分
+        """
+        filter_config = (config or {}).get('seen_filter', {}) or {}
+
+        self.enabled = filter_config.get('enabled', True)
+        self.recent_size = max(0, filter_config.get('recent_size', 50000))
+        self.bloom_bytes = max(1, filter_config.get('bloom_memory_kb', 1024)) * 1024
+        self.recent = OrderedDict()
+        self.bloom = None
+        self.lock = threading.Lock()
+
+        self.hits = 0            # LRU命中，确定已存在
+        self.misses = 0          # 布隆过滤器未命中，确定是新条目
+        self.lookups = 0         # 无法确定，查询了数据库
+        self.false_positives = 0 # 查询数据库后发现是新条目（布隆过滤器误判）
+
+    def warm(self, hashes: Iterable[int], expected_items: int):
+        """
+        用数据库中已有的指纹初始化过滤器
+
+        Args:
+            hashes: 已有条目的指纹，按写入顺序从旧到新
+            expected_items: 预计的条目总数，用于选择布隆过滤器的哈希函数个数
+        """
+        # 预留一倍的增长空间，按 k = m/n * ln2 选择哈希函数个数
+        capacity = max(expected_items * 2, 1000)
+        num_hashes = round(self.bloom_bytes * 8 / capacity * math.log(2))
+        bloom = BloomFilter(self.bloom_bytes, min(MAX_HASHES, max(MIN_HASHES, num_hashes)))
+
+        with self.lock:
+            self.bloom = bloom
+            self.recent.clear()
+            for value in hashes:
+                self._add(value)
+
+        log.info(
+            f"Seen filter warmed with {bloom.count} items "
+            f"({self.bloom_bytes // 1024} KB bloom, {bloom.num_hashes} hashes, "
+            f"~{bloom.false_positive_rate():.2%} false positives, {len(self.recent)} recent)."
+        )
+
+    def contains(self, value: int) -> Optional[bool]:
+        """
+        判断指纹对应的条目是否已保存
+
+        Returns:
+            True表示确定已存在，False表示确定不存在，None表示无法确定（需要查询数据库）
+        """
+        with self.lock:
+            if value in self.recent:
+                self.recent.move_to_end(value)
+                self.hits += 1
+                return True
+            if self.bloom is not None and value not in self.bloom:
+                self.misses += 1
+                return False
+            self.lookups += 1
+            return None
+
+    def record_lookup(self, value: int, exists: bool):
+        """记录一次数据库查询的结果，已存在的指纹放入LRU集合，下次直接命中"""
+        with self.lock:
+            if exists:
+                self._add_recent(value)
+            elif self.bloom is not None:
+                self.false_positives += 1
+
+    def add_many(self, hashes: Iterable[int]):
+        """写入数据库后把指纹加入过滤器"""
+        with self.lock:
+            for value in hashes:
+                self._add(value)
+
+    def stats(self) -> Dict:
+        """命中统计"""
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'lookups': self.lookups,
+                'false_positives': self.false_positives,
+                'recent_items': len(self.recent),
+                'bloom_items': self.bloom.count if self.bloom else 0,
+                'bloom_false_positive_rate': round(self.bloom.false_positive_rate(), 6) if self.bloom else None
+            }
+
+    def _add(self, value: int):
+        if self.bloom is not None:
+            self.bloom.add(value)
+        self._add_recent(value)
+
+    def _add_recent(self, value: int):
+        if not self.recent_size:
+            return
+        self.recent[value] = None
+        self.recent.move_to_end(value)
+        if len(self.recent) > self.recent_size:
+            self.recent.popitem(last=False)
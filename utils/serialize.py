@@ -0,0 +1,201 @@
+import io
+import csv
+import json
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# 条目接口可以返回的字段（feedgrep_items的列）
+ITEM_FIELDS = (
+    'id',
+    'title',
+    'link',
+    'description',
+    'pub_date',
+    'guid',
+    'category',
+    'source_name',
+    'batch_id',
+    'created_at',
+    'item_hash'
+)
+
+# 编码为字符串的字段：item_hash是64位整数，超出JavaScript数字能精确表示的范围（2^53）
+STRING_FIELDS = ('item_hash',)
+
+# 未指定fields参数时按此顺序返回的字段，item_hash只在fields中明确请求时返回
+DEFAULT_FIELDS = tuple(field for field in ITEM_FIELDS if field not in STRING_FIELDS)
+
+# 导出格式及其Content-Type
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8'
+}
+
+# 游标翻页需要的列，未在fields中请求时也会查询，但不会输出
+CURSOR_COLUMNS = ('created_at', 'id')
+
+# 字符串转义使用json模块的C实现，不转义非ASCII字符（与FastAPI的JSONResponse一致）
+_encode_string = json.encoder.encode_basestring
+
+
+def parse_fields(value: Optional[str]) -> List[str]:
+    """
+    解析fields参数
+
+    Args:
+        value: 逗号分隔的字段名，为空时返回DEFAULT_FIELDS
+
+    Returns:
+        去重后的字段列表，顺序与参数一致
+
+    Raises:
+        ValueError: 包含未知的字段
+    """
+    fields = []
+    for name in (value or '').split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in ITEM_FIELDS:
+            raise ValueError(f"Unknown field: {name} (available: {', '.join(ITEM_FIELDS)})")
+        if name not in fields:
+            fields.append(name)
+    return fields or list(DEFAULT_FIELDS)
+
+
+def select_columns(fields: Sequence[str]) -> List[str]:
+    """SQL中查询的列：请求的字段在前，游标需要但未请求的列追加在后"""
+    return list(fields) + [column for column in CURSOR_COLUMNS if column not in fields]
+
+
+def encode_value(value) -> str:
+    """把单个值编码为JSON"""
+    if value is None:
+        return 'null'
+    if value.__class__ is str:
+        return _encode_string(value)
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if value.__class__ is int:
+        return int.__repr__(value)
+    return json.dumps(value, ensure_ascii=False, allow_nan=False)
+
+
+def encode_rows(fields: Sequence[str], rows: Iterable[Sequence]) -> List[str]:
+    """
+    把查询结果的行直接编码为JSON对象，不构建中间的字典
+
+    Args:
+        fields: 输出的字段名，对应每行的前len(fields)列（之后的列不输出），STRING_FIELDS中的字段编码为字符串
+        rows: 查询结果的行（元组或sqlite3.Row）
+
+    Returns:
+        每行一个JSON对象字符串
+    """
+    keys = [_encode_string(field) + ':' for field in fields]
+    string_columns = [index for index, field in enumerate(fields) if field in STRING_FIELDS]
+    if string_columns:
+        rows = (_stringify_columns(row, string_columns) for row in rows)
+    encoded = []
+    for row in rows:
+        encoded.append('{' + ','.join([
+            key + (_encode_string(value) if value.__class__ is str else encode_value(value))
+            for key, value in zip(keys, row)
+        ]) + '}')
+    return encoded
+
+
+def stringify_fields(item: Dict) -> Dict:
+    """把条目字典中STRING_FIELDS的字段转为字符串（用于直接返回字典的接口）"""
+    for field in STRING_FIELDS:
+        if item.get(field) is not None:
+            item[field] = str(item[field])
+    return item
+
+
+def _stringify_columns(row: Sequence, columns: List[int]) -> list:
+    row = list(row)
+    for index in columns:
+        if row[index] is not None:
+            row[index] = str(row[index])
+    return row
+
+
+def encode_items(fields: Sequence[str], items: Iterable[Dict]) -> List[str]:
+    """把条目字典按fields编码为JSON对象（用于归档条目），archived字段原样保留"""
+    output_fields = list(fields) + ['archived']
+    return encode_rows(output_fields, ([item.get(field) for field in output_fields] for item in items))
+
+
+def encode_response(data: List[str], **fields) -> bytes:
+    """
+    拼接列表接口的响应：{"success":true,"data":[...],其他字段}
+
+    Args:
+        data: 已编码的条目
+        **fields: data之后的字段，按参数顺序输出
+
+    Returns:
+        UTF-8编码的响应内容
+    """
+    parts = ['{"success":true,"data":[', ','.join(data), ']']
+    for name, value in fields.items():
+        parts.append(',' + _encode_string(name) + ':' + encode_value(value))
+    parts.append('}')
+    return ''.join(parts).encode('utf-8')
+
+
+class ExportWriter:
+    """
+    把导出的条目逐块编码为NDJSON或CSV，可选gzip压缩
+
+    每块压缩后立即刷新（Z_SYNC_FLUSH），客户端收到的每一块都能完整解压，连接中断时已收到的条目仍然可用。
+    """
+
+    def __init__(self, export_format: str, fields: Sequence[str], compress: bool = False, level: int = 6):
+        """
+        Args:
+            export_format: 导出格式，见EXPORT_FORMATS
+            fields: 输出的字段名，对应每行的前len(fields)列
+            compress: 是否gzip压缩
+            level: gzip压缩级别
+        """
+        self.format = export_format
+        self.fields = list(fields)
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31) if compress else None
+        self.header_written = False
+
+    @property
+    def media_type(self) -> str:
+        return EXPORT_FORMATS[self.format]
+
+    def write(self, rows: Iterable[Sequence]) -> bytes:
+        """
+        编码一块条目，CSV在第一块之前输出表头
+
+        Returns:
+            编码（及压缩）后的内容
+        """
+        if self.format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            if not self.header_written:
+                writer.writerow(self.fields)
+            writer.writerows(rows)
+            text = buffer.getvalue()
+        else:
+            text = ''.join([line + '\n' for line in encode_rows(self.fields, rows)])
+        self.header_written = True
+
+        data = text.encode('utf-8')
+        if self.compressor is not None:
+            data = self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data
+
+    def close(self) -> bytes:
+        """结束导出，返回gzip的结尾（未压缩时为空）"""
+        if self.compressor is None:
+            return b''
+        return self.compressor.flush()